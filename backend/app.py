@@ -16,6 +16,7 @@ from backend.routes.api import router as api_router, egg_router
 from backend.routes.webhooks import router as webhooks_router
 from backend.integrations import home_assistant, weather
 from backend.generator import generation_loop
+from backend.modules import timeform, pubquiz, doorbell
 import backend.stream as stream_mod
 
 logger = logging.getLogger("tijdvorm")
@@ -29,8 +30,18 @@ async def lifespan(app: FastAPI):
     os.makedirs(LIVE_DIR, exist_ok=True)
     os.makedirs(DATA_DIR, exist_ok=True)
 
-    # Create shared httpx client
-    http_client = httpx.AsyncClient()
+    # Create shared httpx client — up to four idle keep-alive connections so
+    # HA and WeatherAPI calls reuse their TCP/TLS connections across polls.
+    # Only idle connections are capped; concurrent requests never queue.
+    # Limits go on the transport (the client ignores its own when given one).
+    # HTTP/2 is negotiated via ALPN, so plain-http HA stays on 1.1
+    http_client = httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(
+            retries=1,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=4),
+        ),
+    )
     home_assistant.set_client(http_client)
     weather.set_client(http_client)
 
@@ -40,16 +51,23 @@ async def lifespan(app: FastAPI):
 
     # Start generation loop
     gen_task = asyncio.create_task(generation_loop(fb))
+
+    # Build the doorbell overlay in the background so the first ring
+    # doesn't pay for font loading and template rendering
+    prewarm_task = asyncio.create_task(asyncio.to_thread(doorbell.prewarm_overlay))
     logger.info("App started")
 
     yield
 
     # Shutdown
+    prewarm_task.cancel()
     gen_task.cancel()
     try:
         await gen_task
     except asyncio.CancelledError:
         pass
+    await timeform.close_browser()
+    await pubquiz.close_browser()
     await http_client.aclose()
     logger.info("App stopped")
 
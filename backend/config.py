@@ -10,6 +10,7 @@ IMAGES_DIR = os.path.join(DATA_DIR, "images")
 EASTER_EGGS_DIR = os.path.join(IMAGES_DIR, "eastereggs")
 LIVE_DIR = os.path.join(DATA_DIR, "live")
 ASSETS_DIR = os.environ.get("ASSETS_DIR", "./assets")
+BROWSER_PROFILE_DIR = os.path.join(DATA_DIR, "browser-profile")  # timeform browser cache
 
 # Asset Paths
 FONT_PATH = os.path.join(ASSETS_DIR, "fonts/SFNS.ttf")
@@ -28,6 +29,7 @@ HA_BASE_URL = os.environ.get("HA_BASE_URL", "").rstrip("/")
 HA_TOKEN = os.environ.get("HA_TOKEN", "")
 HA_TIMEOUT_SECONDS = float(os.environ.get("HA_TIMEOUT_SECONDS", "2.0"))
 HA_CACHE_TTL_SECONDS = float(os.environ.get("HA_CACHE_TTL_SECONDS", "30.0"))
+HA_SAUNA_CACHE_TTL_SECONDS = float(os.environ.get("HA_SAUNA_CACHE_TTL_SECONDS", "5.0"))
 
 HA_TV_ENTITY = os.environ.get("HA_TV_ENTITY", "input_boolean.frame_tv_active")
 HA_EXPLICIT_ENTITY = os.environ.get("HA_EXPLICIT_ENTITY", "input_boolean.explicit_frame_art")
@@ -73,14 +75,25 @@ SLIDER_TRACK_SELECTOR = "span.relative.flex.touch-none.select-none.items-center.
 
 PAGE_LOAD_TIMEOUT = 90000
 SELECTOR_TIMEOUT = 60000
-RENDER_WAIT_TIME = 3  # seconds
+RENDER_WAIT_TIME = 0.25  # seconds of settle after the render-ready check
+SCREENSHOT_JPEG_QUALITY = 92  # browser-side JPEG; the frame is re-encoded anyway
 
 SIMULATE_HOUR = None  # Set hour (0-23) or None
 
+# Extra Chromium flags for the long-lived browsers (Docker's /dev/shm is only
+# 64 MB, which crashes renderers that stay up for days; the on-disk HTTP
+# cache of the persistent timeform profile is capped at 64 MB)
+CHROMIUM_ARGS = [
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    f"--disk-cache-size={64 * 1024 * 1024}",
+]
+
 # --- Weather ---
 WEATHER_LOCATION = "Nieuw-Vennep,NL"
 WEATHER_API_KEY = os.environ.get("WEATHER_API_KEY", "8cd71ded6ce646e888600951251504")
 WEATHER_URL = f"https://api.weatherapi.com/v1/current.json?key={WEATHER_API_KEY}&q={WEATHER_LOCATION}&lang=NL"
+WEATHER_CACHE_TTL_SECONDS = float(os.environ.get("WEATHER_CACHE_TTL_SECONDS", "300"))
 
 # --- Font / Text ---
 TEMP_FONT_SIZE = 63
@@ -96,7 +109,9 @@ CROP_RIGHT_MARGIN = 90
 CROP_TOP = 192
 CROP_BOTTOM_MARGIN = 192
 ZOOM_FACTOR = 1.15
+ZOOM_RESAMPLE = "BILINEAR"  # Pillow Image.Resampling name used for the zoom step
 COLOR_TOLERANCE = 30
+COLOR_SAMPLE_WIDTH = 16  # top-row pixels averaged per alignment colour probe
 
 # --- Night Shift ---
 # Gradually warms the image (less blue, more amber) between sunset and sunrise.
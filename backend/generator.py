@@ -11,6 +11,7 @@ every second.
 """
 
 import asyncio
+import functools
 import io
 import json
 import logging
@@ -47,6 +48,17 @@ _tj = TurboJPEG()
 _tf_base: TimeformBase | None = None
 _sauna_base: SaunaBase | None = None
 
+# Set to cut the current per-second sleep short (doorbell webhook,
+# override/settings changes) so the loop reacts without waiting a tick.
+_wake = asyncio.Event()
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def request_wakeup():
+    """Wake the generation loop early. Safe to call from any thread."""
+    if _loop is not None:
+        _loop.call_soon_threadsafe(_wake.set)
+
 
 def _image_to_jpeg(img: Image.Image, quality: int = 90) -> bytes:
     """Convert a PIL Image to JPEG bytes via turbojpeg (2-5× faster than PIL)."""
@@ -55,6 +67,19 @@ def _image_to_jpeg(img: Image.Image, quality: int = 90) -> bytes:
     return _tj.encode(np.asarray(img), pixel_format=TJPF_RGB, quality=quality)
 
 
+@functools.lru_cache(maxsize=8)
+def _encode_file(path: str, mtime_ns: int, size: int) -> bytes:
+    """Decode and JPEG-encode an image file; cached per (path, mtime, size)."""
+    with Image.open(path) as img:
+        return _image_to_jpeg(img.convert("RGB"))
+
+
+def _file_to_jpeg(path: str) -> bytes:
+    """JPEG bytes for an image file, re-encoded only when the file changes."""
+    st = os.stat(path)
+    return _encode_file(path, st.st_mtime_ns, st.st_size)
+
+
 def _black_frame() -> bytes:
     """Generate a black 1080x1920 JPEG frame with 'First frame' text."""
     img = Image.new("RGB", (OUTPUT_WIDTH, OUTPUT_HEIGHT), (0, 0, 0))
@@ -98,6 +123,21 @@ def _write_live_preview(jpeg_bytes: bytes, meta: dict):
         logger.warning(f"Live preview write failed: {e}")
 
 
+async def _sauna_readings() -> tuple[float | None, float | None, float | None]:
+    """Fetch (power_watts, sensor_temp, sensor_humidity) from HA concurrently."""
+    return await asyncio.gather(
+        get_power_usage(),
+        get_sauna_sensor_temp(),
+        get_sauna_humidity(),
+    )
+
+
+def _cancel_regen(task: asyncio.Task | None) -> None:
+    """Cancel an in-flight background regeneration, if any."""
+    if task and not task.done():
+        task.cancel()
+
+
 async def _stop_doorbell(task: asyncio.Task | None, stop_event: asyncio.Event | None):
     """Gracefully stop the doorbell loop."""
     if stop_event:
@@ -133,8 +173,7 @@ async def _generate_frame(
         _tf_base = None
         _sauna_base = None
         try:
-            img = Image.open(override_path)
-            frame_jpeg = _image_to_jpeg(img)
+            frame_jpeg = await asyncio.to_thread(_file_to_jpeg, override_path)
             meta = {"type": "override", "filename": os.path.basename(override_path)}
             logger.info(f"Override: {meta['filename']}")
         except Exception as e:
@@ -155,11 +194,14 @@ async def _generate_frame(
         if roll:
             _tf_base = None
             _sauna_base = None
-            egg_img = await easter_eggs.get_random_egg()
-            if egg_img:
-                frame_jpeg = _image_to_jpeg(egg_img)
-                meta = {"type": "easteregg", "filename": "easter_egg"}
-                logger.info("Easter egg selected")
+            egg_path = await easter_eggs.get_random_egg_path()
+            if egg_path:
+                try:
+                    frame_jpeg = await asyncio.to_thread(_file_to_jpeg, egg_path)
+                    meta = {"type": "easteregg", "filename": "easter_egg"}
+                    logger.info("Easter egg selected")
+                except Exception as e:
+                    logger.warning(f"Failed to load egg {os.path.basename(egg_path)}: {e}")
 
     # 3. Sauna — cache the base for 1 FPS ticking
     if not frame_jpeg and sauna_on:
@@ -167,9 +209,7 @@ async def _generate_frame(
         base = await sauna.generate_base(sauna_status)
         if base:
             _sauna_base = base
-            power_watts = await get_power_usage()
-            sensor_temp = await get_sauna_sensor_temp()
-            sensor_humidity = await get_sauna_humidity()
+            power_watts, sensor_temp, sensor_humidity = await _sauna_readings()
             img = sauna.compose_frame(base, sauna_status, power_watts, sensor_temp, sensor_humidity)
             frame_jpeg = _image_to_jpeg(img)
             meta = {"type": "sauna", "filename": "sauna"}
@@ -189,7 +229,7 @@ async def _generate_frame(
     # Push to stream
     if frame_jpeg:
         await frame_buffer.push_frame(frame_jpeg)
-        _write_live_preview(frame_jpeg, meta)
+        await asyncio.to_thread(_write_live_preview, frame_jpeg, meta)
     else:
         logger.warning("All generators failed, no frame produced")
 
@@ -199,17 +239,21 @@ async def generation_loop(frame_buffer: FrameBuffer):
 
     When timeform or sauna is the active mode, re-composites the cached
     base with the current HH:MM:SS every second (1 FPS live clock).
+    Full regenerations run as a background task so the clock keeps
+    ticking on the previous base while the next one renders.
     """
-    global _tf_base, _sauna_base
+    global _tf_base, _sauna_base, _loop
 
     logger.info("Generation loop started")
+    _loop = asyncio.get_running_loop()
 
     # Push initial black frame so MJPEG clients don't hang waiting
     await frame_buffer.push_frame(_black_frame())
 
     was_idle = False
-    last_gen_time = 0.0
+    next_gen_at = 0.0        # time.monotonic() deadline for the next full regeneration
     last_second = -1          # track wall-clock second to push each exactly once
+    regen_task: asyncio.Task | None = None
 
     # Doorbell task management
     db_task: asyncio.Task | None = None
@@ -221,145 +265,167 @@ async def generation_loop(frame_buffer: FrameBuffer):
     prev_sauna_on = False
     prev_pubquiz = False
 
-    while True:
-        try:
-            # ── TV active check ──────────────────────────────────
-            tv_active = await is_tv_active()
-
-            if not tv_active and not was_idle:
-                logger.info("TV inactive, ticking in background")
-                # Stop doorbell if running
-                if prev_db_active:
+    try:
+        while True:
+            try:
+                # ── TV active check ──────────────────────────────────
+                tv_active = await is_tv_active()
+
+                if not tv_active and not was_idle:
+                    logger.info("TV inactive, ticking in background")
+                    # Stop doorbell if running
+                    if prev_db_active:
+                        await _stop_doorbell(db_task, db_stop)
+                        db_task = db_stop = None
+                        prev_db_active = False
+                    was_idle = True
+
+                if tv_active and was_idle:
+                    logger.info("TV active again, forcing regeneration")
+                    was_idle = False
+                    next_gen_at = 0.0  # Force full priority chain on wake
+
+                # ── Doorbell check (TV active only) ───────────────────
+                if tv_active:
+                    db_active = await is_doorbell_active()
+                else:
+                    db_active = False
+
+                if db_active and not prev_db_active:
+                    logger.info("Doorbell activated, starting camera feed")
+                    _cancel_regen(regen_task)
+                    db_stop = asyncio.Event()
+                    db_task = asyncio.create_task(doorbell_loop(frame_buffer, db_stop))
+                elif not db_active and prev_db_active:
+                    logger.info("Doorbell deactivated, stopping camera feed")
                     await _stop_doorbell(db_task, db_stop)
                     db_task = db_stop = None
-                    prev_db_active = False
-                was_idle = True
-
-            if tv_active and was_idle:
-                logger.info("TV active again, forcing regeneration")
-                was_idle = False
-                last_gen_time = 0  # Force full priority chain on wake
-
-            # ── Doorbell check (TV active only) ───────────────────
-            if tv_active:
-                db_active = await is_doorbell_active()
-            else:
-                db_active = False
-
-            if db_active and not prev_db_active:
-                logger.info("Doorbell activated, starting camera feed")
-                db_stop = asyncio.Event()
-                db_task = asyncio.create_task(doorbell_loop(frame_buffer, db_stop))
-            elif not db_active and prev_db_active:
-                logger.info("Doorbell deactivated, stopping camera feed")
-                await _stop_doorbell(db_task, db_stop)
-                db_task = db_stop = None
-                last_gen_time = 0  # Force immediate generation after doorbell
-            prev_db_active = db_active
-
-            if db_active:
-                await asyncio.sleep(1)
-                continue
-
-            # ── Pubquiz mode ──────────────────────────────────────
-            pq_settings = easter_eggs.load_settings()
-            pubquiz_on = bool(pq_settings.get("pubquiz_mode", False))
-
-            if pubquiz_on and not prev_pubquiz:
-                logger.info("Pubquiz mode enabled")
-                _tf_base = None
-                _sauna_base = None
-            elif not pubquiz_on and prev_pubquiz:
-                logger.info("Pubquiz mode disabled")
-                await pubquiz.close_browser()
-                last_gen_time = 0  # Force regeneration of normal content
-            prev_pubquiz = pubquiz_on
-
-            if pubquiz_on and tv_active:
-                cur_second = int(time.time())
-                if cur_second != last_second:
-                    last_second = cur_second
-                    screenshot_bytes = await pubquiz.take_screenshot()
-                    if screenshot_bytes:
-                        img = Image.open(io.BytesIO(screenshot_bytes))
-                        if img.size != (OUTPUT_WIDTH, OUTPUT_HEIGHT):
-                            img = img.resize((OUTPUT_WIDTH, OUTPUT_HEIGHT), Image.LANCZOS)
+                    next_gen_at = 0.0  # Force immediate generation after doorbell
+                prev_db_active = db_active
+
+                if db_active:
+                    await asyncio.sleep(1)
+                    continue
+
+                # ── Pubquiz mode ──────────────────────────────────────
+                pq_settings = easter_eggs.load_settings()
+                pubquiz_on = bool(pq_settings.get("pubquiz_mode", False))
+
+                if pubquiz_on and not prev_pubquiz:
+                    logger.info("Pubquiz mode enabled")
+                    _cancel_regen(regen_task)
+                    _tf_base = None
+                    _sauna_base = None
+                elif not pubquiz_on and prev_pubquiz:
+                    logger.info("Pubquiz mode disabled")
+                    await pubquiz.close_browser()
+                    next_gen_at = 0.0  # Force regeneration of normal content
+                prev_pubquiz = pubquiz_on
+
+                if pubquiz_on and tv_active:
+                    cur_second = int(time.time())
+                    if cur_second != last_second:
+                        last_second = cur_second
+                        screenshot_bytes = await pubquiz.take_screenshot()
+                        if screenshot_bytes:
+                            img = Image.open(io.BytesIO(screenshot_bytes))
+                            if img.size != (OUTPUT_WIDTH, OUTPUT_HEIGHT):
+                                img = img.resize((OUTPUT_WIDTH, OUTPUT_HEIGHT), Image.LANCZOS)
+                            jpeg = _image_to_jpeg(img)
+                            await frame_buffer.push_frame(jpeg)
+                            await asyncio.to_thread(
+                                _write_live_preview, jpeg, {"type": "pubquiz", "filename": "pubquiz"}
+                            )
+                    await asyncio.sleep(max(0.05, ((time.time() // 1) + 1.03) - time.time()))
+                    continue
+
+                # ── State change detection (TV active only) ───────────
+                dryer_status = await get_dryer_status()
+
+                if tv_active:
+                    override_path = easter_eggs.get_override_path()
+                    sauna_status = await get_sauna_status()
+                    sauna_on = bool(sauna_status and sauna_status.get("is_on"))
+                else:
+                    override_path = prev_override
+                    sauna_status = None
+                    sauna_on = prev_sauna_on
+
+                force = False
+                if override_path != prev_override:
+                    logger.info(f"Override changed: {override_path}")
+                    force = True
+                if sauna_on != prev_sauna_on:
+                    logger.info(f"Sauna state changed: {'on' if sauna_on else 'off'}")
+                    force = True
+                    if not sauna_on and prev_sauna_on:
+                        sauna.flush_prediction()
+                        _sauna_base = None
+                prev_override = override_path
+                prev_sauna_on = sauna_on
+
+                # ── Generate / tick ──────────────────────────────────
+                now = time.monotonic()
+                interval = UPDATE_INTERVAL_MINUTES * 60
+
+                if regen_task is not None and regen_task.done():
+                    if not regen_task.cancelled() and regen_task.exception():
+                        logger.error(f"Regeneration failed: {regen_task.exception()}")
+                    regen_task = None
+
+                if tv_active and (force or now >= next_gen_at):
+                    # Full regeneration with priority chain (override → egg → sauna → timeform),
+                    # in the background; a forced change supersedes one still running
+                    if force:
+                        _cancel_regen(regen_task)
+                        regen_task = None
+                    if regen_task is None:
+                        regen_task = asyncio.create_task(
+                            _generate_frame(frame_buffer, override_path, sauna_status, sauna_on)
+                        )
+                        next_gen_at = now + interval
+
+                if _sauna_base is not None and sauna_on and sauna_status:
+                    # Sauna tick — compose every second with fresh HA data
+                    cur_second = int(time.time())
+                    if cur_second != last_second:
+                        last_second = cur_second
+                        power_watts, sensor_temp, sensor_humidity = await _sauna_readings()
+                        img = sauna.compose_frame(_sauna_base, sauna_status, power_watts, sensor_temp, sensor_humidity)
                         jpeg = _image_to_jpeg(img)
                         await frame_buffer.push_frame(jpeg)
-                        _write_live_preview(jpeg, {"type": "pubquiz", "filename": "pubquiz"})
-                await asyncio.sleep(max(0.05, ((time.time() // 1) + 1.03) - time.time()))
-                continue
-
-            # ── State change detection (TV active only) ───────────
-            dryer_status = await get_dryer_status()
-
-            if tv_active:
-                override_path = easter_eggs.get_override_path()
-                sauna_status = await get_sauna_status()
-                sauna_on = bool(sauna_status and sauna_status.get("is_on"))
-            else:
-                override_path = prev_override
-                sauna_status = None
-                sauna_on = prev_sauna_on
-
-            force = False
-            if override_path != prev_override:
-                logger.info(f"Override changed: {override_path}")
-                force = True
-            if sauna_on != prev_sauna_on:
-                logger.info(f"Sauna state changed: {'on' if sauna_on else 'off'}")
-                force = True
-                if not sauna_on and prev_sauna_on:
-                    sauna.flush_prediction()
-                    _sauna_base = None
-            prev_override = override_path
-            prev_sauna_on = sauna_on
 
-            # ── Generate / tick ──────────────────────────────────
-            now = time.time()
-            interval = UPDATE_INTERVAL_MINUTES * 60
-
-            if tv_active and (force or (now - last_gen_time >= interval)):
-                # Full regeneration with priority chain (override → egg → sauna → timeform)
-                await _generate_frame(frame_buffer, override_path, sauna_status, sauna_on)
-                last_gen_time = time.time()
-
-            elif _sauna_base is not None and sauna_on and sauna_status:
-                # Sauna tick — compose every second with fresh HA data
-                cur_second = int(time.time())
-                if cur_second != last_second:
-                    last_second = cur_second
-                    power_watts = await get_power_usage()
-                    sensor_temp = await get_sauna_sensor_temp()
-                    sensor_humidity = await get_sauna_humidity()
-                    img = sauna.compose_frame(_sauna_base, sauna_status, power_watts, sensor_temp, sensor_humidity)
-                    jpeg = _image_to_jpeg(img)
-                    await frame_buffer.push_frame(jpeg)
-
-            elif _tf_base is None and _sauna_base is None:
-                # No cached base yet (first run) — generate one even if TV is off
-                base = await timeform.generate_base()
-                if base:
-                    _tf_base = base
-                    last_gen_time = time.time()
-                    logger.info("Initial timeform base generated")
-
-            elif _tf_base is not None:
-                # Tick cached timeform base — always runs (TV on or off) for instant wake
-                cur_second = int(time.time())
-                if cur_second != last_second:
-                    last_second = cur_second
-                    img = timeform.compose_frame(_tf_base, dryer_status=dryer_status)
-                    jpeg = _image_to_jpeg(img)
-                    await frame_buffer.push_frame(jpeg)
+                elif _tf_base is None and _sauna_base is None and regen_task is None:
+                    # No cached base yet (first run) — generate one even if TV is off
+                    base = await timeform.generate_base()
+                    if base:
+                        _tf_base = base
+                        next_gen_at = time.monotonic() + interval
+                        logger.info("Initial timeform base generated")
+
+                elif _tf_base is not None:
+                    # Tick cached timeform base — always runs (TV on or off) for instant wake
+                    cur_second = int(time.time())
+                    if cur_second != last_second:
+                        last_second = cur_second
+                        img = timeform.compose_frame(_tf_base, dryer_status=dryer_status)
+                        jpeg = _image_to_jpeg(img)
+                        await frame_buffer.push_frame(jpeg)
 
-        except Exception as e:
-            logger.error(f"Generation cycle error: {e}", exc_info=True)
-
-        # ── Wall-clock aligned sleep ──────────────────────────────
-        # Sleep until 30ms past the next whole second so strftime
-        # always returns the new value.  This prevents drift and
-        # ensures each second is displayed exactly once.
-        now = time.time()
-        next_second = (now // 1) + 1.03
-        await asyncio.sleep(max(0.05, next_second - now))
+            except Exception as e:
+                logger.error(f"Generation cycle error: {e}", exc_info=True)
+
+            # ── Wall-clock aligned sleep ──────────────────────────────
+            # Sleep until 30ms past the next whole second so strftime
+            # always returns the new value.  This prevents drift and
+            # ensures each second is displayed exactly once.
+            # A wakeup request ends the wait early.
+            now = time.time()
+            next_second = (now // 1) + 1.03
+            try:
+                await asyncio.wait_for(_wake.wait(), timeout=max(0.05, next_second - now))
+            except asyncio.TimeoutError:
+                pass
+            _wake.clear()
+    finally:
+        _cancel_regen(regen_task)
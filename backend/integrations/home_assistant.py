@@ -1,5 +1,6 @@
 """Home Assistant integration — async API calls via httpx."""
 
+import json
 import logging
 import time
 
@@ -9,12 +10,17 @@ from datetime import datetime, timezone
 
 from backend.config import (
     HA_BASE_URL, HA_TOKEN, HA_EXPLICIT_ENTITY, HA_TIMEOUT_SECONDS,
-    HA_CACHE_TTL_SECONDS, HA_SAUNA_ENTITY, HA_POWER_ENTITY,
+    HA_CACHE_TTL_SECONDS, HA_SAUNA_CACHE_TTL_SECONDS, HA_SAUNA_ENTITY, HA_POWER_ENTITY,
     HA_TEMP_ENTITY, HA_DOORBELL_ACTIVE_ENTITY, HA_TV_ENTITY,
     HA_DRYER_ENTITY, HA_DRYER_JOB_STATE_ENTITY,
     HA_SAUNA_TEMP_ENTITY, HA_SAUNA_HUMIDITY_ENTITY,
 )
 
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 logger = logging.getLogger("tijdvorm.ha")
 
 # Module-level shared client (set by app.py on startup)
@@ -23,6 +29,9 @@ _client: httpx.AsyncClient | None = None
 # Cache for explicit-allowed check
 _ha_cache = {"value": None, "ts": 0.0}
 
+# Cache for sauna status (polled every second by the generator loop)
+_sauna_cache = {"value": None, "ts": 0.0}
+
 
 def set_client(client: httpx.AsyncClient):
     global _client
@@ -43,7 +52,7 @@ async def _get_state(entity_id: str) -> dict | None:
             timeout=HA_TIMEOUT_SECONDS,
         )
         resp.raise_for_status()
-        return resp.json()
+        return _json_loads(resp.content)
     except Exception as e:
         logger.debug(f"HA state fetch failed for {entity_id}: {e}")
         return None
@@ -85,18 +94,24 @@ async def is_doorbell_active() -> bool:
 
 
 async def get_sauna_status() -> dict | None:
-    """Returns {is_on, current_temp, set_temp} or None."""
+    """Returns {is_on, current_temp, set_temp} or None. Cached for HA_SAUNA_CACHE_TTL_SECONDS."""
+    now = time.time()
+    if _sauna_cache["ts"] and (now - _sauna_cache["ts"]) < HA_SAUNA_CACHE_TTL_SECONDS:
+        return _sauna_cache["value"]
+
     data = await _get_state(HA_SAUNA_ENTITY)
-    if data is None:
-        return None
-    if data.get("state") == "heat_cool":
+    status = None
+    if data is not None and data.get("state") == "heat_cool":
         attrs = data.get("attributes", {})
-        return {
+        status = {
             "is_on": True,
             "current_temp": attrs.get("current_temperature"),
             "set_temp": attrs.get("temperature"),
         }
-    return None
+
+    _sauna_cache["value"] = status
+    _sauna_cache["ts"] = now
+    return status
 
 
 async def get_power_usage() -> float | None:
@@ -1,13 +1,19 @@
 """Weather API integration — async via httpx."""
 
 import logging
+import time
 
 import httpx
 
+from backend.config import WEATHER_CACHE_TTL_SECONDS
+
 logger = logging.getLogger("tijdvorm.weather")
 
 _client: httpx.AsyncClient | None = None
 
+# url -> (fetched_at, data); current conditions only change every few minutes
+_weather_cache: dict[str, tuple[float, dict]] = {}
+
 
 def set_client(client: httpx.AsyncClient):
     global _client
@@ -15,13 +21,19 @@ def set_client(client: httpx.AsyncClient):
 
 
 async def get_weather_data(url: str) -> dict | None:
-    """Fetch weather data JSON from the specified URL."""
+    """Fetch weather data JSON from the specified URL. Cached for WEATHER_CACHE_TTL_SECONDS."""
+    now = time.time()
+    cached = _weather_cache.get(url)
+    if cached and (now - cached[0]) < WEATHER_CACHE_TTL_SECONDS:
+        return cached[1]
     if not _client:
         return None
     try:
         resp = await _client.get(url, timeout=10)
         resp.raise_for_status()
-        return resp.json()
+        data = resp.json()
     except Exception as e:
         logger.warning(f"Weather fetch failed: {e}")
         return None
+    _weather_cache[url] = (now, data)
+    return data
@@ -209,6 +209,14 @@ def _get_overlay():
     return _overlay
 
 
+def prewarm_overlay():
+    """Build the overlay template ahead of the first ring (call via to_thread at startup)."""
+    try:
+        _get_overlay()
+    except Exception as e:
+        logger.warning(f"Doorbell overlay prewarm failed: {e}")
+
+
 # ── RTSP reader loop ──────────────────────────────────────────────────────
 #
 # Architecture: two concurrent async tasks prevent pipe backpressure.
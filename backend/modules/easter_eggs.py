@@ -1,12 +1,12 @@
 """Easter egg image management — manifest, override, weighted random selection."""
 
+import copy
+import itertools
 import json
 import logging
 import os
 import random
 
-from PIL import Image
-
 from backend.config import (
     EASTER_EGGS_DIR, EASTER_EGGS_MANIFEST, EASTER_EGGS_OVERRIDE,
     EASTER_EGGS_SETTINGS,
@@ -15,15 +15,52 @@ from backend.integrations.home_assistant import ha_explicit_allowed
 
 logger = logging.getLogger("tijdvorm.easter_eggs")
 
+_EGG_EXTS = frozenset({".png", ".jpg", ".jpeg", ".webp"})
 
-def load_manifest() -> dict:
+# Parsed manifest, reused while the file's mtime is unchanged
+_manifest_cache = {"mtime": -1, "data": None}
+
+# Filtered egg directory listing, reused while the directory's mtime is unchanged
+_egg_dir_cache = {"mtime": -1, "files": []}
+
+# Parsed settings/override JSON keyed by path: {path: (mtime_ns, data)}
+_json_file_cache: dict[str, tuple[int, object]] = {}
+
+# Weighted selection table, rebuilt when the directory, manifest or
+# explicit-content flag changes
+_selection_cache = {"key": None, "candidates": [], "cum_weights": []}
+
+
+def _parse_manifest() -> dict | None:
+    """Parse manifest.json, reusing the last result while its mtime is unchanged.
+
+    Returns None if the file is missing or not a JSON object. Callers must
+    not mutate the result.
+    """
+    try:
+        mtime = os.stat(EASTER_EGGS_MANIFEST).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if mtime == _manifest_cache["mtime"]:
+        return _manifest_cache["data"]
     try:
-        if not os.path.exists(EASTER_EGGS_MANIFEST):
-            return {"version": 1, "images": {}}
         with open(EASTER_EGGS_MANIFEST, "r", encoding="utf-8") as f:
             data = json.load(f)
-        if not isinstance(data, dict):
+    except Exception:
+        data = None
+    if not isinstance(data, dict):
+        data = None
+    _manifest_cache["mtime"] = mtime
+    _manifest_cache["data"] = data
+    return data
+
+
+def load_manifest() -> dict:
+    try:
+        data = _parse_manifest()
+        if data is None:
             return {"version": 1, "images": {}}
+        data = copy.deepcopy(data)
         data.setdefault("version", 1)
         data.setdefault("images", {})
         if not isinstance(data["images"], dict):
@@ -33,24 +70,52 @@ def load_manifest() -> dict:
         return {"version": 1, "images": {}}
 
 
+def _read_text(path: str) -> str | None:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
 def save_manifest(manifest: dict):
     os.makedirs(EASTER_EGGS_DIR, exist_ok=True)
     tmp = EASTER_EGGS_MANIFEST + ".tmp"
     try:
+        payload = json.dumps(manifest, indent=2, sort_keys=True)
+        if payload == _read_text(EASTER_EGGS_MANIFEST):
+            return
         with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(manifest, f, indent=2, sort_keys=True)
+            f.write(payload)
         os.replace(tmp, EASTER_EGGS_MANIFEST)
+        _manifest_cache["mtime"] = -1
     except Exception as e:
         logger.warning(f"Failed to save manifest: {e}")
 
 
+def _load_json_cached(path: str):
+    """Parse a small JSON state file, reusing the last result while its mtime is unchanged.
+
+    Returns None if the file does not exist. Callers must not mutate the result.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        _json_file_cache.pop(path, None)
+        return None
+    cached = _json_file_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    _json_file_cache[path] = (mtime, data)
+    return data
+
+
 def get_override_path() -> str | None:
     """Returns absolute path to override image, or None."""
     try:
-        if not os.path.exists(EASTER_EGGS_OVERRIDE):
-            return None
-        with open(EASTER_EGGS_OVERRIDE, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = _load_json_cached(EASTER_EGGS_OVERRIDE)
         filename = data.get("filename") if isinstance(data, dict) else None
         if not filename or not isinstance(filename, str):
             return None
@@ -65,10 +130,7 @@ def get_override_path() -> str | None:
 def load_settings() -> dict:
     defaults = {"easter_egg_chance_denominator": 10}
     try:
-        if not os.path.exists(EASTER_EGGS_SETTINGS):
-            return defaults
-        with open(EASTER_EGGS_SETTINGS, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = _load_json_cached(EASTER_EGGS_SETTINGS)
         if not isinstance(data, dict):
             return defaults
         denom = int(data.get("easter_egg_chance_denominator", 10))
@@ -80,11 +142,15 @@ def load_settings() -> dict:
 def _get_candidates() -> tuple[list[str], set | None, set, dict]:
     """Returns (files, enabled_set, explicit_set, priority_map)."""
     try:
-        files = [
-            f for f in os.listdir(EASTER_EGGS_DIR)
-            if not f.startswith("rotated_")
-            and f.lower().endswith((".png", ".jpg", ".jpeg", ".webp"))
-        ]
+        mtime = os.stat(EASTER_EGGS_DIR).st_mtime_ns
+        if mtime != _egg_dir_cache["mtime"]:
+            _egg_dir_cache["files"] = [
+                f for f in os.listdir(EASTER_EGGS_DIR)
+                if not f.startswith("rotated_")
+                and os.path.splitext(f)[1].lower() in _EGG_EXTS
+            ]
+            _egg_dir_cache["mtime"] = mtime
+        files = list(_egg_dir_cache["files"])
     except Exception:
         files = []
 
@@ -92,55 +158,65 @@ def _get_candidates() -> tuple[list[str], set | None, set, dict]:
     explicit_set = set()
     priority_map = {}
 
+    # A missing or unparseable manifest leaves enabled_set as None, so every
+    # file in the directory stays eligible
     try:
-        if os.path.exists(EASTER_EGGS_MANIFEST):
-            with open(EASTER_EGGS_MANIFEST, "r", encoding="utf-8") as f:
-                manifest = json.load(f)
-            images = manifest.get("images", {}) if isinstance(manifest, dict) else {}
-            if isinstance(images, dict):
-                enabled = []
-                for name, meta in images.items():
-                    if not isinstance(meta, dict):
-                        continue
-                    if meta.get("enabled", True):
-                        enabled.append(name)
-                    if meta.get("explicit", False):
-                        explicit_set.add(name)
-                    prio = max(1, min(10, int(meta.get("priority", 5))))
-                    priority_map[name] = prio
-                enabled_set = set(enabled)
+        manifest = _parse_manifest()
     except Exception:
-        pass
+        manifest = None
+    images = manifest.get("images", {}) if manifest is not None else None
+    if isinstance(images, dict):
+        enabled = []
+        for name, meta in images.items():
+            if not isinstance(meta, dict):
+                continue
+            if meta.get("enabled", True):
+                enabled.append(name)
+            if meta.get("explicit", False):
+                explicit_set.add(name)
+            try:
+                prio = max(1, min(10, int(meta.get("priority", 5))))
+            except (TypeError, ValueError):
+                prio = 5
+            priority_map[name] = prio
+        enabled_set = set(enabled)
 
     return files, enabled_set, explicit_set, priority_map
 
 
-async def get_random_egg() -> Image.Image | None:
-    """Pick a random enabled easter egg, respecting explicit filter. Returns PIL Image."""
-    if not os.path.exists(EASTER_EGGS_DIR):
-        return None
+def _mtime_ns(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return -1
+
 
+def _build_selection(allow_explicit: bool) -> tuple[list[str], list[int]]:
+    """Returns (candidates, cumulative weights) for weighted egg selection."""
     files, enabled_set, explicit_set, priority_map = _get_candidates()
     candidates = [f for f in files if f in enabled_set] if enabled_set is not None else files
+    if not allow_explicit:
+        candidates = [f for f in candidates if f not in explicit_set]
+    weights = [max(1, priority_map.get(f, 5)) for f in candidates]
+    return candidates, list(itertools.accumulate(weights))
 
-    if not candidates:
+
+async def get_random_egg_path() -> str | None:
+    """Pick a random enabled easter egg, respecting explicit filter. Returns its path."""
+    if not os.path.exists(EASTER_EGGS_DIR):
         return None
 
     allow_explicit = await ha_explicit_allowed()
-    if not allow_explicit:
-        candidates = [f for f in candidates if f not in explicit_set]
+    key = (_mtime_ns(EASTER_EGGS_DIR), _mtime_ns(EASTER_EGGS_MANIFEST), allow_explicit)
+    if key != _selection_cache["key"]:
+        candidates, cum_weights = _build_selection(allow_explicit)
+        _selection_cache.update(key=key, candidates=candidates, cum_weights=cum_weights)
 
+    candidates = _selection_cache["candidates"]
     if not candidates:
         return None
 
-    weights = [max(1, priority_map.get(f, 5)) for f in candidates]
-    selected = random.choices(candidates, weights=weights, k=1)[0]
+    selected = random.choices(candidates, cum_weights=_selection_cache["cum_weights"], k=1)[0]
 
-    try:
-        path = os.path.join(EASTER_EGGS_DIR, selected)
-        img = Image.open(path)
-        logger.info(f"Selected easter egg: {selected}")
-        return img
-    except Exception as e:
-        logger.warning(f"Failed to load egg {selected}: {e}")
-        return None
+    logger.info(f"Selected easter egg: {selected}")
+    return os.path.join(EASTER_EGGS_DIR, selected)
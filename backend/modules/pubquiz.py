@@ -9,7 +9,7 @@ import logging
 
 from playwright.async_api import async_playwright, Browser, Page, Playwright
 
-from backend.config import OUTPUT_WIDTH, OUTPUT_HEIGHT
+from backend.config import OUTPUT_WIDTH, OUTPUT_HEIGHT, CHROMIUM_ARGS
 
 logger = logging.getLogger("tijdvorm.pubquiz")
 
@@ -35,7 +35,7 @@ async def ensure_browser() -> Page | None:
     logger.info("Launching pubquiz browser...")
     try:
         _pw = await async_playwright().start()
-        _browser = await _pw.chromium.launch()
+        _browser = await _pw.chromium.launch(args=CHROMIUM_ARGS)
         _page = await _browser.new_page(
             viewport={"width": OUTPUT_WIDTH, "height": OUTPUT_HEIGHT},
         )
@@ -6,19 +6,24 @@ Two-phase rendering:
 """
 
 import asyncio
+import functools
+import json
 import logging
+import os
+import re
 import time
 from dataclasses import dataclass
 
 from PIL import Image, ImageDraw
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, BrowserContext, Playwright
 
 from backend.config import (
     TIMEFORM_URL, OUTPUT_WIDTH, OUTPUT_HEIGHT, PAGE_LOAD_TIMEOUT,
-    SELECTOR_TIMEOUT, RENDER_WAIT_TIME, SIMULATE_HOUR,
-    SLIDER_TRACK_SELECTOR, HIDE_CSS, ARTWORK_FRAME_SELECTOR,
+    SELECTOR_TIMEOUT, RENDER_WAIT_TIME, SCREENSHOT_JPEG_QUALITY, SIMULATE_HOUR,
+    SLIDER_TRACK_SELECTOR, HIDE_CSS, ARTWORK_FRAME_SELECTOR, CHROMIUM_ARGS,
     TEMP_FONT_SIZE, COND_FONT_SIZE, TIME_FONT_SIZE, LINE_SPACING,
-    TEXT_PADDING, TEXT_COLOR, WEATHER_URL,
+    TEXT_PADDING, TEXT_COLOR, WEATHER_URL, BROWSER_PROFILE_DIR,
+    CROP_LEFT, CROP_TOP, CROP_RIGHT_MARGIN, CROP_BOTTOM_MARGIN, ZOOM_FACTOR,
 )
 from backend.utils.image import process_screenshot, load_fonts, apply_night_shift
 from backend.integrations.weather import get_weather_data
@@ -26,6 +31,69 @@ from backend.integrations.home_assistant import get_home_temperature
 
 logger = logging.getLogger("tijdvorm.timeform")
 
+# True once the artwork frame has a size, web fonts are loaded and no
+# finite (transition/one-shot) animations are still running.
+RENDER_READY_JS = """
+el => el
+  && el.getBoundingClientRect().width > 0
+  && document.fonts.status === "loaded"
+  && document.getAnimations().every(a =>
+       a.playState !== "running" || a.effect.getComputedTiming().endTime === Infinity)
+"""
+
+# Resolves after the next frame has been painted (double requestAnimationFrame)
+NEXT_PAINT_JS = "() => new Promise(r => requestAnimationFrame(() => requestAnimationFrame(r)))"
+
+# Only the artwork region is captured — Chromium encodes and we decode just
+# the pixels that survive the crop
+SCREENSHOT_CLIP = {
+    "x": CROP_LEFT,
+    "y": CROP_TOP,
+    "width": OUTPUT_WIDTH - CROP_LEFT - CROP_RIGHT_MARGIN,
+    "height": OUTPUT_HEIGHT - CROP_TOP - CROP_BOTTOM_MARGIN,
+}
+
+HIDE_STYLE_ID = "tijdvorm-hide-css"
+
+# Installs HIDE_CSS at document start, so the UI chrome is never laid out
+# or painted. <html> may not exist yet when init scripts run; wait for it.
+HIDE_CSS_INIT_JS = f"""
+(() => {{
+  const install = () => {{
+    const style = document.createElement("style");
+    style.id = "{HIDE_STYLE_ID}";
+    style.textContent = {json.dumps(HIDE_CSS)};
+    document.documentElement.appendChild(style);
+  }};
+  if (document.documentElement) {{
+    install();
+  }} else {{
+    new MutationObserver((_, obs) => {{
+      if (document.documentElement) {{ obs.disconnect(); install(); }}
+    }}).observe(document, {{ childList: true }});
+  }}
+}})();
+"""
+
+SET_HIDE_CSS_DISABLED_JS = f"d => {{ document.getElementById('{HIDE_STYLE_ID}').disabled = d; }}"
+
+# Third-party requests that never affect the artwork. Matched by URL so only
+# these go through a Python route handler, not every asset the page loads.
+BLOCKED_URL_RE = re.compile(
+    r"google-analytics\.com|googletagmanager\.com|plausible\.io|"
+    r"sentry\.io|segment\.(?:io|com)|hotjar\.com|/favicon\.ico"
+)
+
+# Persistent browser context — launched on first screenshot, reused every
+# minute so the HTTP cache and connections to timeforms.app stay warm
+_pw: Playwright | None = None
+_context: BrowserContext | None = None
+_context_closed = False
+
+# Viewport and SIMULATE_HOUR are fixed, so the slider click point is too —
+# measured on the first capture, dropped with the browser
+_slider_click_point: tuple[float, float] | None = None
+
 DRYER_JOB_LABELS: dict[str, str] = {
     "cooling": "Afkoelen",
     "delay_wash": "Uitgesteld",
@@ -69,64 +137,189 @@ class TimeformBase:
     align_artwork_top: bool     # text goes opposite side of artwork
 
 
-async def _take_screenshot() -> bytes | None:
-    """Launch browser, navigate to timeforms.app, capture screenshot."""
+async def _get_context() -> BrowserContext | None:
+    """Return the shared browser context, launching the browser (Chromium, then Firefox) if needed.
+
+    The context is persistent (on-disk profile under BROWSER_PROFILE_DIR),
+    so the HTTP cache for timeforms.app also survives backend restarts.
+    """
+    global _pw, _context, _context_closed
+
+    if _context is not None and not _context_closed:
+        return _context
+    if _context is not None:
+        logger.warning("Timeform browser disconnected, relaunching")
+        await close_browser()
+
     logger.info("Launching browser...")
-    async with async_playwright() as p:
-        browser = None
+    # Chromium rasterises the zoom itself: the clip stays in CSS pixels and
+    # comes back ZOOM_FACTOR times larger, so no resample is needed in Python
+    context_options = {
+        "viewport": {"width": OUTPUT_WIDTH, "height": OUTPUT_HEIGHT},
+        "device_scale_factor": ZOOM_FACTOR,
+    }
+    # Driver and context stay local until fully set up: a regen task can be
+    # cancelled mid-launch, and a half-published driver would leak
+    pw: Playwright | None = None
+    context: BrowserContext | None = None
+    try:
+        pw = await async_playwright().start()
         try:
-            browser = await p.chromium.launch()
+            profile_dir = os.path.join(BROWSER_PROFILE_DIR, "chromium")
+            _clear_stale_profile_lock(profile_dir)
+            context = await pw.chromium.launch_persistent_context(
+                profile_dir, args=CHROMIUM_ARGS, **context_options,
+            )
         except Exception as e:
             logger.warning(f"Chromium failed: {e}, trying Firefox...")
+            context = await pw.firefox.launch_persistent_context(
+                os.path.join(BROWSER_PROFILE_DIR, "firefox"), **context_options,
+            )
+        context.on("close", _on_context_close)
+        await context.route(BLOCKED_URL_RE, lambda route: route.abort())
+        await context.add_init_script(HIDE_CSS_INIT_JS)
+    except BaseException as e:
+        if context is not None:
             try:
-                browser = await p.firefox.launch()
-            except Exception as e2:
-                logger.error(f"Firefox also failed: {e2}")
-                return None
-        if not browser:
-            return None
+                await context.close()
+            except Exception:
+                pass
+        if pw is not None:
+            try:
+                await pw.stop()
+            except Exception:
+                pass
+        if not isinstance(e, Exception):
+            raise  # CancelledError and friends
+        logger.error(f"Browser launch failed: {e}")
+        return None
+
+    _pw, _context, _context_closed = pw, context, False
+    return _context
 
-        page = await browser.new_page(viewport={"width": OUTPUT_WIDTH, "height": OUTPUT_HEIGHT})
+
+def _on_context_close(_ctx: BrowserContext) -> None:
+    """Mark the shared context dead (browser crashed or was killed)."""
+    global _context_closed
+    _context_closed = True
+
+
+def _clear_stale_profile_lock(profile_dir: str) -> None:
+    """Remove Chromium's singleton lock left behind by a killed container."""
+    for name in ("SingletonLock", "SingletonCookie", "SingletonSocket"):
         try:
-            logger.info(f"Navigating to {TIMEFORM_URL}...")
-            await page.goto(TIMEFORM_URL, timeout=PAGE_LOAD_TIMEOUT, wait_until="networkidle")
+            os.remove(os.path.join(profile_dir, name))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.debug(f"Could not remove {name}: {e}")
 
-            # Time simulation (if enabled)
-            if SIMULATE_HOUR is not None and 0 <= SIMULATE_HOUR <= 23:
-                logger.info(f"Simulating time: {SIMULATE_HOUR}:00")
-                try:
-                    slider = page.locator(SLIDER_TRACK_SELECTOR)
-                    await slider.wait_for(state="visible", timeout=SELECTOR_TIMEOUT)
-                    bbox = await slider.bounding_box()
-                    if bbox:
-                        click_x = bbox["x"] + (SIMULATE_HOUR / 23) * bbox["width"]
-                        click_y = bbox["y"] + bbox["height"] / 2
-                        await page.mouse.click(click_x, click_y)
-                        await asyncio.sleep(1)
-                except Exception as e:
-                    logger.warning(f"Slider interaction failed: {e}")
 
-            # Inject CSS to hide UI elements
-            try:
-                await page.add_style_tag(content=HIDE_CSS)
-            except Exception as e:
-                logger.warning(f"CSS injection failed: {e}")
+async def close_browser():
+    """Shut down the persistent timeform browser."""
+    global _pw, _context, _context_closed, _slider_click_point
+
+    if _context:
+        try:
+            await _context.close()
+        except Exception:
+            pass
+    if _pw:
+        try:
+            await _pw.stop()
+        except Exception:
+            pass
+    _pw = None
+    _context = None
+    _context_closed = False
+    _slider_click_point = None
+
 
-            # Wait for artwork frame
+async def _take_screenshot() -> bytes | None:
+    """Open a page in the shared context, navigate to timeforms.app, capture screenshot."""
+    global _slider_click_point
+
+    context = await _get_context()
+    if not context:
+        return None
+
+    try:
+        page = await context.new_page()
+    except Exception as e:
+        logger.error(f"New page failed: {e}")
+        await close_browser()
+        return None
+
+    try:
+        logger.info(f"Navigating to {TIMEFORM_URL}...")
+        await page.goto(TIMEFORM_URL, timeout=PAGE_LOAD_TIMEOUT, wait_until="domcontentloaded")
+
+        # Time simulation (if enabled)
+        if SIMULATE_HOUR is not None and 0 <= SIMULATE_HOUR <= 23:
+            logger.info(f"Simulating time: {SIMULATE_HOUR}:00")
+            # The hide stylesheet also hides the slider — lift it for the click
             try:
-                await page.locator(ARTWORK_FRAME_SELECTOR).wait_for(state="visible", timeout=SELECTOR_TIMEOUT)
-                await asyncio.sleep(RENDER_WAIT_TIME)
+                await page.evaluate(SET_HIDE_CSS_DISABLED_JS, False)
+                slider = page.locator(SLIDER_TRACK_SELECTOR)
+                await slider.wait_for(state="visible", timeout=SELECTOR_TIMEOUT)
+                if _slider_click_point is None:
+                    bbox = await slider.bounding_box()
+                    if bbox:
+                        _slider_click_point = (
+                            bbox["x"] + (SIMULATE_HOUR / 23) * bbox["width"],
+                            bbox["y"] + bbox["height"] / 2,
+                        )
+                if _slider_click_point is not None:
+                    await page.mouse.click(*_slider_click_point)
+                    # The render-ready wait below covers the colour transition
+                    await page.evaluate(NEXT_PAINT_JS)
             except Exception as e:
-                logger.error(f"Artwork frame not found: {e}")
-                return None
-
-            return await page.screenshot()
+                logger.warning(f"Slider interaction failed: {e}")
+            finally:
+                try:
+                    await page.evaluate(SET_HIDE_CSS_DISABLED_JS, True)
+                except Exception as e:
+                    logger.warning(f"Re-enabling hide CSS failed: {e}")
 
+        # Wait for artwork frame
+        try:
+            frame = page.locator(ARTWORK_FRAME_SELECTOR)
+            await frame.wait_for(state="visible", timeout=SELECTOR_TIMEOUT)
         except Exception as e:
-            logger.error(f"Browser error: {e}")
+            logger.error(f"Artwork frame not found: {e}")
             return None
-        finally:
-            await browser.close()
+
+        # Wait until the frame is laid out, fonts are in and the colour
+        # transitions have finished, then give the compositor a short settle
+        try:
+            handle = await frame.element_handle()
+            await page.wait_for_function(RENDER_READY_JS, arg=handle, timeout=SELECTOR_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Render-ready wait failed, capturing anyway: {e}")
+        await asyncio.sleep(RENDER_WAIT_TIME)
+
+        return await page.screenshot(
+            clip=SCREENSHOT_CLIP, type="jpeg", quality=SCREENSHOT_JPEG_QUALITY,
+        )
+
+    except Exception as e:
+        logger.error(f"Browser error: {e}")
+        return None
+    finally:
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+
+@functools.lru_cache(maxsize=64)
+def _text_height(font, text: str) -> int:
+    """Rendered height of text in font, memoized per (font, text).
+
+    Only for strings that recur across frames (temperature, condition, dryer).
+    """
+    bbox = font.getbbox(text)
+    return bbox[3] - bbox[1]
 
 
 def _draw_text_overlay(
@@ -137,8 +330,9 @@ def _draw_text_overlay(
     time_str: str,
     dryer_status: dict | None = None,
 ) -> Image.Image:
-    """Draw weather/time text onto a copy of the image."""
-    image = image.convert("RGBA")
+    """Draw weather/time text onto the image (RGB; nothing here needs alpha)."""
+    if image.mode != "RGB":
+        image = image.convert("RGB")
     draw = ImageDraw.Draw(image)
 
     temp_str = text_data.get("temp", "--°C")
@@ -156,13 +350,16 @@ def _draw_text_overlay(
     bbox_dryer_h = 0
     try:
         if font_temp:
-            bbox_temp_h = draw.textbbox((0, 0), temp_str, font=font_temp)[3] - draw.textbbox((0, 0), temp_str, font=font_temp)[1]
+            bbox_temp_h = _text_height(font_temp, temp_str)
         if font_cond:
-            bbox_cond_h = draw.textbbox((0, 0), cond_str, font=font_cond)[3] - draw.textbbox((0, 0), cond_str, font=font_cond)[1]
+            bbox_cond_h = _text_height(font_cond, cond_str)
         if font_time:
-            bbox_time_h = draw.textbbox((0, 0), time_str, font=font_time)[3] - draw.textbbox((0, 0), time_str, font=font_time)[1]
+            # The clock string changes every second — measuring it directly
+            # beats a memo lookup that would always miss
+            bbox_time = font_time.getbbox(time_str)
+            bbox_time_h = bbox_time[3] - bbox_time[1]
         if dryer_str and font_cond:
-            bbox_dryer_h = draw.textbbox((0, 0), dryer_str, font=font_cond)[3] - draw.textbbox((0, 0), dryer_str, font=font_cond)[1]
+            bbox_dryer_h = _text_height(font_cond, dryer_str)
     except Exception:
         pass
 
@@ -207,16 +404,38 @@ def compose_frame(base: TimeformBase, dryer_status: dict | None = None) -> Image
     )
 
 
+def _process_and_grade(screenshot_bytes: bytes) -> tuple[Image.Image | None, bool]:
+    """Process (crop, zoom, align) the screenshot and apply warm night-shift grading."""
+    background_image, align_artwork_top = process_screenshot(
+        screenshot_bytes, precropped=True, prezoomed=True,
+    )
+    if background_image:
+        background_image = apply_night_shift(background_image)
+    return background_image, align_artwork_top
+
+
 async def generate_base() -> TimeformBase | None:
     """Generate the expensive base: browser screenshot + weather data + fonts.
 
     Returns a TimeformBase that can be passed to compose_frame() every second.
     """
-    # Fetch weather
-    weather_data = await get_weather_data(WEATHER_URL)
-    text_data = {"temp": "--°C", "condition": "Weather unavailable"}
+    # Load fonts
+    fonts = load_fonts()
+    if not fonts.get("font_temp") or not fonts.get("font_cond"):
+        logger.error("Essential fonts could not be loaded")
+        return None
 
-    if weather_data and "current" in weather_data:
+    # Weather, HA temperature and the browser screenshot are independent —
+    # run them together so the HTTP calls hide behind the screenshot
+    weather_data, ha_temp, screenshot_bytes = await asyncio.gather(
+        get_weather_data(WEATHER_URL),
+        get_home_temperature(),
+        _take_screenshot(),
+        return_exceptions=True,
+    )
+
+    text_data = {"temp": "--°C", "condition": "Weather unavailable"}
+    if isinstance(weather_data, dict) and "current" in weather_data:
         try:
             text_data["temp"] = f"{weather_data['current']['temp_c']:.0f}°C"
             text_data["condition"] = weather_data["current"]["condition"]["text"]
@@ -224,31 +443,25 @@ async def generate_base() -> TimeformBase | None:
             pass
 
     # Override with HA home temperature
-    ha_temp = await get_home_temperature()
-    if ha_temp is not None:
+    if isinstance(ha_temp, (int, float)):
         text_data["temp"] = f"{ha_temp:.0f}°C"
 
-    # Load fonts
-    fonts = load_fonts()
-    if not fonts.get("font_temp") or not fonts.get("font_cond"):
-        logger.error("Essential fonts could not be loaded")
-        return None
-
-    # Take screenshot
-    screenshot_bytes = await _take_screenshot()
+    if isinstance(screenshot_bytes, BaseException):
+        logger.error(f"Screenshot error: {screenshot_bytes}")
+        screenshot_bytes = None
     if not screenshot_bytes:
         logger.error("Screenshot failed")
         return None
 
-    # Process (crop, zoom, align)
-    background_image, align_artwork_top = process_screenshot(screenshot_bytes)
+    # Decode/align and night-shift grading are CPU-bound — keep them off the
+    # event loop so the MJPEG stream and API stay responsive meanwhile
+    background_image, align_artwork_top = await asyncio.to_thread(
+        _process_and_grade, screenshot_bytes,
+    )
     if not background_image:
         logger.error("Screenshot processing failed")
         return None
 
-    # Apply warm night-shift colour grading based on time of day
-    background_image = apply_night_shift(background_image)
-
     return TimeformBase(
         image=background_image,
         text_data=text_data,
@@ -16,11 +16,14 @@ from backend.config import (
     EASTER_EGGS_OVERRIDE, EASTER_EGGS_SETTINGS,
     LIVE_DIR, LIVE_STATE_PATH,
 )
+from backend.generator import request_wakeup
 
 logger = logging.getLogger("tijdvorm.api")
 
 router = APIRouter(prefix="/api")
 
+IMAGE_EXTS = frozenset({".png", ".jpg", ".jpeg", ".webp"})
+
 DEFAULT_SETTINGS: dict[str, Any] = {
     "easter_egg_chance_denominator": 10,
     "pubquiz_mode": True,
@@ -40,7 +43,7 @@ def _ensure_dirs():
 
 
 def _is_allowed_image(filename: str) -> bool:
-    return filename.lower().endswith((".png", ".jpg", ".jpeg", ".webp"))
+    return os.path.splitext(filename)[1].lower() in IMAGE_EXTS
 
 
 def _safe_filename(filename: str) -> str:
@@ -79,10 +82,18 @@ def _load_manifest() -> dict[str, Any]:
 
 
 def _save_manifest(manifest: dict[str, Any]):
+    """Write the manifest, skipping the write when the content is unchanged."""
     _ensure_dirs()
+    payload = json.dumps(manifest, indent=2, sort_keys=True)
+    try:
+        with open(EASTER_EGGS_MANIFEST, "r", encoding="utf-8") as f:
+            if f.read() == payload:
+                return
+    except OSError:
+        pass
     tmp = EASTER_EGGS_MANIFEST + ".tmp"
     with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write(payload)
     os.replace(tmp, EASTER_EGGS_MANIFEST)
 
 
@@ -326,6 +337,7 @@ def set_override(payload: dict[str, Any]):
     filename = payload.get("filename", None)
     if filename is None:
         _save_override(None)
+        request_wakeup()
         return {"ok": True, "filename": None}
 
     if not isinstance(filename, str):
@@ -340,6 +352,7 @@ def set_override(payload: dict[str, Any]):
         raise HTTPException(status_code=404, detail="Image not found on disk")
 
     _save_override(filename)
+    request_wakeup()
     return {"ok": True, "filename": filename, "url": f"/eastereggs/{filename}"}
 
 
@@ -367,6 +380,7 @@ def set_settings(payload: dict[str, Any]):
     if "pubquiz_mode" in payload:
         settings["pubquiz_mode"] = bool(payload["pubquiz_mode"])
     _save_settings(settings)
+    request_wakeup()
     return {"ok": True, "easter_egg_chance_denominator": denom_i, "pubquiz_mode": settings.get("pubquiz_mode", False)}
 
 
@@ -10,6 +10,8 @@ from typing import Any
 
 from fastapi import APIRouter, HTTPException
 
+from backend.generator import request_wakeup
+
 logger = logging.getLogger("tijdvorm.webhooks")
 
 router = APIRouter(prefix="/api")
@@ -20,16 +22,19 @@ async def ha_webhook(payload: dict[str, Any]):
     """
     Receives events from Home Assistant automations.
     The generator polls HA booleans every 1s, so state changes are
-    picked up automatically. This endpoint acknowledges the event.
+    picked up automatically. This endpoint wakes the generator so the
+    next poll happens immediately, then acknowledges the event.
     """
     action = payload.get("action")
 
     if action in ("doorbell", "doorbell_on"):
         logger.info("Webhook: doorbell_on received (generator polls HA state)")
+        request_wakeup()
         return {"ok": True, "status": "doorbell state polled by generator"}
 
     if action == "doorbell_off":
         logger.info("Webhook: doorbell_off received (generator polls HA state)")
+        request_wakeup()
         return {"ok": True, "status": "doorbell state polled by generator"}
 
     raise HTTPException(status_code=400, detail=f"Unknown action: {action}")
@@ -1,46 +1,67 @@
+import functools
 import io
+import logging
 import os
 from datetime import datetime
+
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
+from turbojpeg import TurboJPEG, TJPF_RGB
 from backend.config import (
     FONT_PATH, TEMP_FONT_SIZE, COND_FONT_SIZE, TIME_FONT_SIZE,
     CROP_LEFT, CROP_TOP, CROP_RIGHT_MARGIN, CROP_BOTTOM_MARGIN,
-    ZOOM_FACTOR, OUTPUT_WIDTH, OUTPUT_HEIGHT, COLOR_TOLERANCE,
+    ZOOM_FACTOR, ZOOM_RESAMPLE, OUTPUT_WIDTH, OUTPUT_HEIGHT, COLOR_TOLERANCE, COLOR_SAMPLE_WIDTH,
     NIGHT_SHIFT_START_HOUR, NIGHT_SHIFT_FULL_HOUR,
     NIGHT_SHIFT_END_HOUR, NIGHT_SHIFT_FADE_HOUR,
     NIGHT_SHIFT_STRENGTH,
 )
 
+logger = logging.getLogger("tijdvorm.image")
+
+_tj = TurboJPEG()
+
 def color_diff(color1, color2):
-    """Calculate the sum of absolute differences between two RGB tuples."""
+    """Calculate the sum of absolute differences between two RGB tuples.
+
+    Also accepts NumPy arrays of shape (..., 3+) and broadcasts, returning
+    an int array of per-pixel differences.
+    """
+    if isinstance(color1, np.ndarray) or isinstance(color2, np.ndarray):
+        a = np.asarray(color1, dtype=np.int16)[..., :3]
+        b = np.asarray(color2, dtype=np.int16)[..., :3]
+        return np.abs(a - b).sum(axis=-1)
     if not color1 or not color2 or len(color1) < 3 or len(color2) < 3:
         return float('inf')
-    return sum(abs(c1 - c2) for c1, c2 in zip(color1[:3], color2[:3]))
+    return abs(color1[0] - color2[0]) + abs(color1[1] - color2[1]) + abs(color1[2] - color2[2])
+
+@functools.lru_cache(maxsize=16)
+def _truetype(abs_path, size):
+    """Parse a TrueType font once per (path, size); callers share the instance."""
+    return ImageFont.truetype(abs_path, size)
 
 def load_font_with_fallback(font_path, size):
     """Load font from a specific path, falling back to Pillow default."""
     abs_path = os.path.abspath(font_path)
-    # print(f"[Font Load] Attempting to load: {abs_path}")
+    logger.debug("Loading font %s (size %s)", abs_path, size)
     try:
-        font = ImageFont.truetype(abs_path, size)
-        # print(f"[Font Load] Successfully loaded: {abs_path}")
+        font = _truetype(abs_path, size)
         return font
     except IOError as e:
-        print(f"[Font Load] Warning: IOError loading '{abs_path}': {e}. Using default Pillow font.")
+        logger.warning("IOError loading font '%s': %s. Using default Pillow font.", abs_path, e)
         try:
             font = ImageFont.load_default()
-            print(f"[Font Load] Loaded default Pillow font instead.")
+            logger.info("Loaded default Pillow font instead")
             return font
         except IOError as e2:
-            print(f"[Font Load] Error: Could not load even the default Pillow font: {e2}")
+            logger.error("Could not load even the default Pillow font: %s", e2)
             return None
     except Exception as e:
-        print(f"[Font Load] Unexpected error loading font '{abs_path}': {e}")
+        logger.error("Unexpected error loading font '%s': %s", abs_path, e)
         return None
 
 def load_fonts(scale=1.0):
     """Load all required fonts using the specified path."""
-    print(f"Loading fonts (scale={scale})...")
+    logger.debug("Loading fonts (scale=%s)", scale)
     fonts = {
         'font_temp': load_font_with_fallback(FONT_PATH, int(TEMP_FONT_SIZE * scale)),
         'font_cond': load_font_with_fallback(FONT_PATH, int(COND_FONT_SIZE * scale)),
@@ -84,42 +105,60 @@ def apply_night_shift(image: Image.Image) -> Image.Image:
     return Image.merge("RGB", (r, g, b))
 
 
-def process_screenshot(screenshot_bytes):
-    """Crop, get colors, zoom, create canvas, align, and paste."""
-    print("Processing screenshot...")
+def process_screenshot(screenshot_bytes, precropped=False, prezoomed=False):
+    """Crop, get colors, zoom, create canvas, align, and paste.
+
+    Cropping, colour probes and the canvas work on NumPy views of the
+    decoded screenshot; only the zoom goes through Pillow's resampler.
+    Pass precropped=True when the browser already clipped the screenshot
+    to the crop region, and prezoomed=True when it rendered at
+    ZOOM_FACTOR device pixels per CSS pixel.
+    """
+    logger.debug("Processing screenshot")
     try:
-        img = Image.open(io.BytesIO(screenshot_bytes))
+        if screenshot_bytes[:2] == b"\xff\xd8":
+            # JPEG screenshot: libjpeg-turbo straight into packed RGB, no alpha
+            arr = _tj.decode(screenshot_bytes, pixel_format=TJPF_RGB)
+        else:
+            img = Image.open(io.BytesIO(screenshot_bytes))
+            arr = np.asarray(img if img.mode == "RGB" else img.convert("RGB"))
     except Exception as e:
-        print(f"Error opening screenshot bytes: {e}"); return None, True # Default align top
+        logger.error("Error opening screenshot bytes: %s", e); return None, True # Default align top
 
     # Crop
     try:
-        crop_box = (CROP_LEFT, CROP_TOP, img.width - CROP_RIGHT_MARGIN, img.height - CROP_BOTTOM_MARGIN)
-        if crop_box[0] >= crop_box[2] or crop_box[1] >= crop_box[3]: raise ValueError("Invalid crop dimensions")
-        cropped_img = img.crop(crop_box)
-        cropped_w, cropped_h = cropped_img.size
-        print(f"Cropped image size: {cropped_w}x{cropped_h}")
-    except Exception as e: print(f"Error cropping image: {e}"); return None, True
+        if precropped:
+            cropped = arr
+        else:
+            img_h, img_w = arr.shape[:2]
+            crop_box = (CROP_LEFT, CROP_TOP, img_w - CROP_RIGHT_MARGIN, img_h - CROP_BOTTOM_MARGIN)
+            if crop_box[0] >= crop_box[2] or crop_box[1] >= crop_box[3]: raise ValueError("Invalid crop dimensions")
+            cropped = arr[crop_box[1]:crop_box[3], crop_box[0]:crop_box[2]]
+        cropped_h, cropped_w = cropped.shape[:2]
+        logger.debug("Cropped image size: %sx%s", cropped_w, cropped_h)
+    except Exception as e: logger.error("Error cropping image: %s", e); return None, True
 
     # Get Colors
     top_left_color = (255, 255, 255); top_center_color = (255, 255, 255); dynamic_bg_color = top_left_color
     try:
-        top_left_color_raw = cropped_img.getpixel((0, 0))
-        top_left_color = top_left_color_raw[:3] if len(top_left_color_raw) == 4 else top_left_color_raw
-        dynamic_bg_color = top_left_color
-        center_x = cropped_w // 2
-        top_center_color_raw = cropped_img.getpixel((center_x, 0))
-        top_center_color = top_center_color_raw[:3] if len(top_center_color_raw) == 4 else top_center_color_raw
-    except Exception as e: print(f"Warning: Could not get pixel colors: {e}.")
+        # Canvas fill uses the exact corner pixel; the alignment probes are
+        # short top-row averages so JPEG noise can't flip the decision
+        dynamic_bg_color = tuple(int(c) for c in cropped[0, 0])
+        top_row = cropped[0].astype(np.float32)
+        half = COLOR_SAMPLE_WIDTH // 2
+        cx = cropped_w // 2
+        top_left_color = tuple(int(round(c)) for c in top_row[:COLOR_SAMPLE_WIDTH].mean(axis=0))
+        top_center_color = tuple(int(round(c)) for c in top_row[max(cx - half, 0):cx + half].mean(axis=0))
+    except Exception as e: logger.warning("Could not get pixel colors: %s", e)
 
     # Zoom
-    scaled_w = int(cropped_w * ZOOM_FACTOR)
-    scaled_h = int(cropped_h * ZOOM_FACTOR)
-    scaled_img = cropped_img.resize((scaled_w, scaled_h), Image.Resampling.LANCZOS)
-
-    # Create Background
-    background = Image.new('RGB', (OUTPUT_WIDTH, OUTPUT_HEIGHT), dynamic_bg_color)
-    print(f"Created background canvas with color {dynamic_bg_color}")
+    zoom = 1.0 if prezoomed else ZOOM_FACTOR
+    scaled_w = int(cropped_w * zoom)
+    scaled_h = int(cropped_h * zoom)
+    if (scaled_w, scaled_h) == (cropped_w, cropped_h):
+        scaled = cropped  # nothing to resample — skip the Pillow round-trip
+    else:
+        scaled = np.asarray(Image.fromarray(cropped).resize((scaled_w, scaled_h), Image.Resampling[ZOOM_RESAMPLE]))
 
     # Determine Alignment
     offset_x = (OUTPUT_WIDTH - scaled_w) // 2
@@ -127,10 +166,26 @@ def process_screenshot(screenshot_bytes):
     align_to_top = diff > COLOR_TOLERANCE
     offset_y = 0 if align_to_top else (OUTPUT_HEIGHT - scaled_h)
     alignment_desc = "top" if align_to_top else "bottom"
-    print(f"Aligning artwork to {alignment_desc} (color diff: {diff})")
+    logger.debug("Aligning artwork to %s (color diff: %s)", alignment_desc, diff)
 
-    # Paste Artwork
-    background.paste(scaled_img, (offset_x, offset_y))
-
-    return background, align_to_top
+    # Artwork covers the whole output — crop it instead of filling a canvas
+    if scaled_w >= OUTPUT_WIDTH and scaled_h >= OUTPUT_HEIGHT:
+        src_x, src_y = -offset_x, -offset_y
+        return Image.fromarray(np.ascontiguousarray(
+            scaled[src_y:src_y + OUTPUT_HEIGHT, src_x:src_x + OUTPUT_WIDTH]
+        )), align_to_top
 
+    # Create Background
+    canvas = np.full((OUTPUT_HEIGHT, OUTPUT_WIDTH, 3), dynamic_bg_color, dtype=np.uint8)
+    logger.debug("Created background canvas with color %s", dynamic_bg_color)
+
+    # Paste Artwork (clipped to the canvas, like Image.paste)
+    dst_x0, dst_y0 = max(0, offset_x), max(0, offset_y)
+    dst_x1, dst_y1 = min(OUTPUT_WIDTH, offset_x + scaled_w), min(OUTPUT_HEIGHT, offset_y + scaled_h)
+    if dst_x0 < dst_x1 and dst_y0 < dst_y1:
+        canvas[dst_y0:dst_y1, dst_x0:dst_x1] = scaled[
+            dst_y0 - offset_y:dst_y1 - offset_y,
+            dst_x0 - offset_x:dst_x1 - offset_x,
+        ]
+
+    return Image.fromarray(canvas), align_to_top
@@ -5,9 +5,11 @@ Tests device discovery, connection, and streaming of various media types.
 """
 
 import asyncio
+import functools
 import json
 import logging
 import os
+import socket
 import sys
 import time
 from typing import List, Optional
@@ -32,6 +34,34 @@ logger = logging.getLogger(__name__)
 
 CREDENTIALS_FILE = os.path.join(DATA_DIR, "airplay_credentials.json")
 
+# Banner separators
+_SEP35 = "=" * 35
+_SEP50 = "=" * 50
+_SEP60 = "=" * 60
+
+@functools.lru_cache(maxsize=8)
+def _local_ip_for(tv_ip: str) -> Optional[str]:
+    """Return the local address of the interface that routes to the TV.
+
+    Connecting a UDP socket only performs a route lookup, no packet is sent.
+    Resolved on first use and memoized per TV address.
+    """
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect((tv_ip, 7000))
+            return s.getsockname()[0]
+    except OSError:
+        pass
+    try:
+        return socket.gethostbyname(socket.gethostname())
+    except OSError:
+        return None
+
+# Feature status markers
+_OK_UNI = "✅"
+_NO_UNI = "❌"
+_WARN_UNI = "⚠️"
+
 # Test URLs for different media types
 TEST_URLS = {
     # Images (iPhone compatible)
@@ -46,17 +76,24 @@ TEST_URLS = {
     # HLS streams (iPhone preferred)
     "hls_stream": "https://devstreaming-cdn.apple.com/videos/streaming/examples/img_bipbop_adv_example_fmp4/master.m3u8",
     "local_hls": "http://localhost:8000/hls/playlist.m3u8",  # Local HLS stream
-
-    # Apple TV+ style content (if iPhone works with these)
-    "apple_sample": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4",
-
-    # Test alternative libraries
-    "test_airplayer": "https://commondatastorage.googleapis.com/gtv-videos-bucket/sample/BigBuckBunny.mp4",
 }
 
+# DLNA works better with MP4/JPEG, so skip HLS and MOV entries
+DLNA_TEST_URLS = {key: url for key, url in TEST_URLS.items() if "hls" not in key and "mov" not in key}
+
 class AirPlayDebugger:
     def __init__(self):
         self.loop = asyncio.get_event_loop()
+        self._last_addr = None
+        # Samsung TVs only accept a couple of concurrent AirPlay sessions
+        self._stream_sem = asyncio.Semaphore(2)
+        self._creds = None
+        self._creds_mtime = None
+        self._services = {}
+
+    def local_ip(self, tv_address) -> Optional[str]:
+        """Local IP address of the interface facing the TV."""
+        return _local_ip_for(str(tv_address))
 
     async def scan_devices(self, target_ip: Optional[str] = None) -> List:
         """Scan for AirPlay devices."""
@@ -70,10 +107,11 @@ class AirPlayDebugger:
             results = await scan(loop=self.loop)
 
         if results:
-            print(f"✅ Found {len(results)} device(s):")
+            lines = [f"✅ Found {len(results)} device(s):"]
             for i, device in enumerate(results, 1):
-                print(f"   {i}. {device.name} ({device.address}) - {device.identifier}")
-                print(f"      Services: {[s.protocol.name for s in device.services]}")
+                lines.append(f"   {i}. {device.name} ({device.address}) - {device.identifier}")
+                lines.append(f"      Services: {[s.protocol.name for s in device.services]}")
+            sys.stdout.write("\n".join(lines) + "\n")
         else:
             print("❌ No AirPlay devices found")
 
@@ -119,7 +157,8 @@ class AirPlayDebugger:
 
             try:
                 # Set a timeout for the streaming attempt
-                await asyncio.wait_for(atv.stream.play_url(url), timeout=10.0)
+                async with self._stream_sem:
+                    await asyncio.wait_for(atv.stream.play_url(url), timeout=10.0)
                 print("✅ Stream command sent successfully")
                 print("   Note: Check your TV to see if content is playing")
 
@@ -146,12 +185,17 @@ class AirPlayDebugger:
             return False
 
     def load_credentials(self):
-        """Load saved AirPlay credentials."""
-        if not os.path.exists(CREDENTIALS_FILE):
+        """Load saved AirPlay credentials, reusing the parsed file while it is unchanged."""
+        try:
+            mtime = os.stat(CREDENTIALS_FILE).st_mtime_ns
+        except FileNotFoundError:
             print(f"❌ Credentials file not found: {CREDENTIALS_FILE}")
             print("   Run scripts/pair_airplay.py first to pair with your TV")
             return None
 
+        if self._creds and mtime == self._creds_mtime:
+            return self._creds
+
         try:
             with open(CREDENTIALS_FILE, "r") as f:
                 creds_data = json.load(f)
@@ -166,6 +210,8 @@ class AirPlayDebugger:
             print(f"   Address: {address}")
             print(f"   Identifier: {identifier}")
 
+            self._creds = creds_data
+            self._creds_mtime = mtime
             return creds_data
 
         except Exception as e:
@@ -184,6 +230,7 @@ class AirPlayDebugger:
         if results:
             device_conf = results[0]
             print(f"✅ Found device by IP: {device_conf.name}")
+            self._last_addr = str(device_conf.address)
             return device_conf
 
         # Fallback to broadcast scan
@@ -194,6 +241,7 @@ class AirPlayDebugger:
         for res in results:
             if str(res.address) == address:
                 print(f"✅ Found device by IP match: {res.name}")
+                self._last_addr = str(res.address)
                 return res
 
         # Try to match by identifier
@@ -201,16 +249,53 @@ class AirPlayDebugger:
             for res in results:
                 if res.identifier == identifier:
                     print(f"✅ Found device by identifier match: {res.name}")
+                    self._last_addr = str(res.address)
                     return res
 
         print("❌ Could not find device")
         return None
 
+    async def _scan_last_addr(self):
+        """Best-effort scan of the last known address; None on any failure."""
+        try:
+            return await scan(loop=self.loop, hosts=[self._last_addr])
+        except Exception as e:
+            logger.debug(f"Speculative scan of {self._last_addr} failed: {e}")
+            return None
+
+    async def _prepare(self):
+        """Load credentials and find the paired device.
+
+        The credentials file is read while a speculative scan of the last known
+        address runs, so the disk read is hidden behind the network scan.
+        """
+        scan_task = None
+        async with asyncio.TaskGroup() as tg:
+            creds_task = tg.create_task(asyncio.to_thread(self.load_credentials))
+            if self._last_addr:
+                scan_task = tg.create_task(self._scan_last_addr())
+
+        creds = creds_task.result()
+        if not creds:
+            return None, None
+
+        results = scan_task.result() if scan_task else None
+        if results and self._last_addr == creds.get("address"):
+            device_conf = results[0]
+            print(f"✅ Found device by cached IP: {device_conf.name}")
+        else:
+            device_conf = await self.find_device_by_credentials(creds)
+
+        if device_conf:
+            device_conf.set_credentials(pyatv.Protocol.AirPlay, creds["credentials"])
+            self._services = {s.protocol: s for s in device_conf.services}
+        return creds, device_conf
+
     async def run_device_tests(self, device_conf):
         """Run comprehensive tests on a device."""
-        print(f"\n{'='*50}")
+        print("\n" + _SEP50)
         print(f"🧪 RUNNING COMPREHENSIVE TESTS ON: {device_conf.name}")
-        print(f"{'='*50}")
+        print(_SEP50)
 
         # Test 1: Basic connection
         print("\n1. Testing basic connection...")
@@ -240,9 +325,9 @@ class AirPlayDebugger:
         # Test image
         await self.test_streaming(device_conf, TEST_URLS["image_jpeg"], "JPEG Image")
 
-        print(f"\n{'='*50}")
+        print("\n" + _SEP50)
         print("✅ All tests completed")
-        print(f"{'='*50}")
+        print(_SEP50)
 
     async def analyze_capabilities(self, device_conf):
         """Analyze what capabilities the device reports vs what actually works."""
@@ -254,12 +339,14 @@ class AirPlayDebugger:
             # Get all features
             all_features = atv.features.all_features(include_unsupported=True)
 
-            print("📋 Complete feature list:")
+            lines = ["📋 Complete feature list:"]
             for name, feature in all_features.items():
-                status = "✅" if feature.state.name == "Available" else "❌" if feature.state.name == "Unsupported" else "⚠️"
-                print(f"   {status} {name.name}: {feature.state.name}")
+                state = feature.state.name
+                status = _OK_UNI if state == "Available" else _NO_UNI if state == "Unsupported" else _WARN_UNI
+                lines.append(f"   {status} {name.name}: {state}")
                 if feature.options:
-                    print(f"      Options: {feature.options}")
+                    lines.append(f"      Options: {feature.options}")
+            sys.stdout.write("\n".join(lines) + "\n")
 
             # Check device info
             try:
@@ -278,26 +365,26 @@ class AirPlayDebugger:
 
     async def diagnose_iphone_compatibility(self, device_conf):
         """Diagnose why iPhone works but pyatv doesn't."""
-        print(f"\n🔍 DIAGNOSTIC MODE: iPhone vs pyatv compatibility")
-        print("=" * 60)
-
-        print("📱 iPhone typically uses:")
-        print("   • AirPlay 2 protocol")
-        print("   • HLS streams preferred")
-        print("   • Automatic codec negotiation")
-        print("   • Different timing and session handling")
-        print()
-
-        # Test 1: Check if device supports AirPlay 2
-        print("1. Checking AirPlay protocol support...")
-        airplay_service = None
-        for service in device_conf.services:
-            if service.protocol == pyatv.Protocol.AirPlay:
-                airplay_service = service
-                break
+        sys.stdout.write("\n".join([
+            "\n🔍 DIAGNOSTIC MODE: iPhone vs pyatv compatibility",
+            _SEP60,
+            "📱 iPhone typically uses:",
+            "   • AirPlay 2 protocol",
+            "   • HLS streams preferred",
+            "   • Automatic codec negotiation",
+            "   • Different timing and session handling",
+            "",
+            # Test 1: Check if device supports AirPlay 2
+            "1. Checking AirPlay protocol support...",
+        ]) + "\n")
+        airplay_service = self._services.get(pyatv.Protocol.AirPlay)
 
         if airplay_service:
-            print(f"   ✅ AirPlay service found on port {getattr(airplay_service, 'port', 'unknown')}")
+            port = getattr(airplay_service, "port", None)
+            if port is not None:
+                print(f"   ✅ AirPlay service found on port {port}")
+            else:
+                print("   ✅ AirPlay service found")
         else:
             print("   ❌ No AirPlay service found")
             return
@@ -336,42 +423,45 @@ class AirPlayDebugger:
 
         # Test 5: Check network/firewall issues
         print("\n5. Network diagnostics...")
-        import socket
-        try:
-            local_ip = socket.gethostbyname(socket.gethostname())
-            print(f"   🏠 Local IP: {local_ip}")
-            print(f"   📺 TV IP: {device_conf.address}")
-            print("   💡 Check: Can your computer reach the TV directly?")
-            print("   💡 Check: Is there a firewall blocking pyatv but not iPhone?")
-        except Exception as e:
-            print(f"   ❌ Network check failed: {e}")
+        local_ip = self.local_ip(device_conf.address)
+        if local_ip:
+            sys.stdout.write("\n".join([
+                f"   🏠 Local IP: {local_ip}",
+                f"   📺 TV IP: {device_conf.address}",
+                "   💡 Check: Can your computer reach the TV directly?",
+                "   💡 Check: Is there a firewall blocking pyatv but not iPhone?",
+            ]) + "\n")
+        else:
+            print("   ❌ Network check failed: could not determine local IP")
 
         # Test 6: Version/protocol differences
-        print("\n6. Protocol analysis...")
-        print("   📋 pyatv version info:")
-        print(f"      pyatv version: {getattr(pyatv, '__version__', 'unknown')}")
-        print("   📋 iPhone uses different protocol negotiation")
-        print("   💡 Samsung TVs may require specific AirPlay 2 features that pyatv doesn't implement")
-
-        print(f"\n{'='*60}")
-        print("🎯 DIAGNOSTIC SUMMARY:")
-        print("If iPhone works but pyatv doesn't, common causes:")
-        print("   1. Protocol version differences (AirPlay 2 vs 1)")
-        print("   2. Authentication/session handling differences")
-        print("   3. Content format requirements (HLS preferred)")
-        print("   4. Network/firewall blocking specific connections")
-        print("   5. TV firmware requiring specific client features")
-        print()
-        print("💡 RECOMMENDATIONS:")
-        print("   • Use DLNA instead (more reliable for Samsung)")
-        print("   • Test with TV's web interface for uploads")
-        print("   • Check if iPhone uses screen mirroring vs media streaming")
-        print(f"{'='*60}")
+        sys.stdout.write("\n".join([
+            "\n6. Protocol analysis...",
+            "   📋 pyatv version info:",
+            f"      pyatv version: {getattr(pyatv, '__version__', 'unknown')}",
+            "   📋 iPhone uses different protocol negotiation",
+            "   💡 Samsung TVs may require specific AirPlay 2 features that pyatv doesn't implement",
+            "",
+            _SEP60,
+            "🎯 DIAGNOSTIC SUMMARY:",
+            "If iPhone works but pyatv doesn't, common causes:",
+            "   1. Protocol version differences (AirPlay 2 vs 1)",
+            "   2. Authentication/session handling differences",
+            "   3. Content format requirements (HLS preferred)",
+            "   4. Network/firewall blocking specific connections",
+            "   5. TV firmware requiring specific client features",
+            "",
+            "💡 RECOMMENDATIONS:",
+            "   • Use DLNA instead (more reliable for Samsung)",
+            "   • Test with TV's web interface for uploads",
+            "   • Check if iPhone uses screen mirroring vs media streaming",
+            _SEP60,
+        ]) + "\n")
 
     async def interactive_menu(self):
         """Run interactive debugging menu."""
         print("🎯 AirPlay & DLNA Debug Menu")
-        print("=" * 35)
+        print(_SEP35)
 
         while True:
             print("\nChoose an option:")
@@ -395,20 +485,14 @@ class AirPlayDebugger:
                             print(f"{i}: {dev.name} ({dev.address})")
 
                 elif choice == "2":
-                    creds = self.load_credentials()
-                    if creds:
-                        device_conf = await self.find_device_by_credentials(creds)
-                        if device_conf:
-                            device_conf.set_credentials(pyatv.Protocol.AirPlay, creds["credentials"])
-                            await self.test_connection(device_conf)
+                    _, device_conf = await self._prepare()
+                    if device_conf:
+                        await self.test_connection(device_conf)
 
                 elif choice == "3":
-                    creds = self.load_credentials()
-                    if creds:
-                        device_conf = await self.find_device_by_credentials(creds)
-                        if device_conf:
-                            device_conf.set_credentials(pyatv.Protocol.AirPlay, creds["credentials"])
-                            await self.run_device_tests(device_conf)
+                    _, device_conf = await self._prepare()
+                    if device_conf:
+                        await self.run_device_tests(device_conf)
 
                 elif choice == "4":
                     print("\nAvailable test URLs:")
@@ -421,12 +505,9 @@ class AirPlayDebugger:
                     else:
                         url = url_key
 
-                    creds = self.load_credentials()
-                    if creds:
-                        device_conf = await self.find_device_by_credentials(creds)
-                        if device_conf:
-                            device_conf.set_credentials(pyatv.Protocol.AirPlay, creds["credentials"])
-                            await self.test_streaming(device_conf, url, f"Custom URL: {url}")
+                    _, device_conf = await self._prepare()
+                    if device_conf:
+                        await self.test_streaming(device_conf, url, f"Custom URL: {url}")
 
                 elif choice == "5":
                     print("\nTesting DLNA streaming (recommended for Samsung TVs)...")
@@ -434,9 +515,8 @@ class AirPlayDebugger:
                     from backend.config import TV_IP
 
                     print("Available test URLs:")
-                    for key, url in TEST_URLS.items():
-                        if "hls" not in key and "mov" not in key:  # DLNA works better with MP4/JPEG
-                            print(f"  {key}: {url}")
+                    for key, url in DLNA_TEST_URLS.items():
+                        print(f"  {key}: {url}")
 
                     url_key = input("\nEnter URL key or full URL: ").strip()
                     if url_key in TEST_URLS:
@@ -453,12 +533,9 @@ class AirPlayDebugger:
 
                 elif choice == "6":
                     print("\n🔬 Running iPhone compatibility diagnostics...")
-                    creds = self.load_credentials()
-                    if creds:
-                        device_conf = await self.find_device_by_credentials(creds)
-                        if device_conf:
-                            device_conf.set_credentials(pyatv.Protocol.AirPlay, creds["credentials"])
-                            await self.diagnose_iphone_compatibility(device_conf)
+                    _, device_conf = await self._prepare()
+                    if device_conf:
+                        await self.diagnose_iphone_compatibility(device_conf)
 
                 elif choice == "7":
                     creds = self.load_credentials()
@@ -485,7 +562,7 @@ class AirPlayDebugger:
 async def main():
     """Main function."""
     print("🎬 AirPlay Debug Script for Samsung Frame TV")
-    print("=" * 50)
+    print(_SEP50)
 
     debugger = AirPlayDebugger()
 
@@ -497,12 +574,9 @@ async def main():
             await debugger.scan_devices(TV_IP if len(sys.argv) > 2 and sys.argv[2] == "target" else None)
 
         elif command == "test":
-            creds = debugger.load_credentials()
-            if creds:
-                device_conf = await debugger.find_device_by_credentials(creds)
-                if device_conf:
-                    device_conf.set_credentials(pyatv.Protocol.AirPlay, creds["credentials"])
-                    await debugger.run_device_tests(device_conf)
+            _, device_conf = await debugger._prepare()
+            if device_conf:
+                await debugger.run_device_tests(device_conf)
 
         elif command == "stream":
             if len(sys.argv) < 3:
@@ -510,12 +584,9 @@ async def main():
                 return
 
             url = sys.argv[2]
-            creds = debugger.load_credentials()
-            if creds:
-                device_conf = await debugger.find_device_by_credentials(creds)
-                if device_conf:
-                    device_conf.set_credentials(pyatv.Protocol.AirPlay, creds["credentials"])
-                    await debugger.test_streaming(device_conf, url, f"Command line URL: {url}")
+            _, device_conf = await debugger._prepare()
+            if device_conf:
+                await debugger.test_streaming(device_conf, url, f"Command line URL: {url}")
 
         elif command == "dlna":
             if len(sys.argv) < 3:
@@ -536,12 +607,9 @@ async def main():
 
         elif command == "diagnose":
             print("🔬 Running iPhone compatibility diagnostics...")
-            creds = debugger.load_credentials()
-            if creds:
-                device_conf = await debugger.find_device_by_credentials(creds)
-                if device_conf:
-                    device_conf.set_credentials(pyatv.Protocol.AirPlay, creds["credentials"])
-                    await debugger.diagnose_iphone_compatibility(device_conf)
+            _, device_conf = await debugger._prepare()
+            if device_conf:
+                await debugger.diagnose_iphone_compatibility(device_conf)
 
         else:
             print("Usage: python debug_pyatv.py [scan|test|stream <url>|dlna <url>|diagnose]")
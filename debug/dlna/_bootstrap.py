@@ -0,0 +1,15 @@
+"""
+Shared setup for the DLNA debug scripts.
+Puts the project root on sys.path and makes it the working directory.
+Module caching makes repeated imports free.
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+if os.getcwd() != PROJECT_ROOT:
+    os.chdir(PROJECT_ROOT)
@@ -7,12 +7,9 @@ Simple, fast testing of DLNA functionality to Samsung Frame TV
 import asyncio
 import time
 import sys
-import os
 
 # Add project root to path
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-sys.path.insert(0, project_root)
-os.chdir(project_root)
+import _bootstrap  # noqa: F401
 
 from backend.config import TV_IP
 from backend.integrations.dlna import play_url_via_dlna
@@ -31,25 +28,23 @@ async def quick_test(url: str = None):
     start_time = time.time()
 
     try:
-        result = await asyncio.get_event_loop().run_in_executor(
-            None, play_url_via_dlna, url, TV_IP
-        )
+        result = await asyncio.to_thread(play_url_via_dlna, url, TV_IP)
 
         end_time = time.time()
         duration = end_time - start_time
 
         if result:
             print("✅ SUCCESS")
-            print(".2f")
+            print(f"⏱️  Duration: {duration:.2f}s")
             print("📺 Check your TV - content should be displayed!")
         else:
             print("❌ FAILED")
-            print(".2f")
+            print(f"⏱️  Duration: {duration:.2f}s")
     except Exception as e:
         end_time = time.time()
         duration = end_time - start_time
         print("❌ ERROR")
-        print(".2f")
+        print(f"⏱️  Duration: {duration:.2f}s")
         print(f"Error: {e}")
 
 def main():
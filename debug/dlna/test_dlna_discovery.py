@@ -5,77 +5,246 @@ Tests discovery speed and device compatibility for DLNA streaming
 """
 
 import asyncio
+import ipaddress
+import json
+import socket
 import time
 import sys
 import os
-from typing import List, Dict, Any
+import xml.etree.ElementTree as ET
+from typing import List, Dict, Any, Optional
+from urllib.parse import urljoin, urlparse
+
+import httpx
 
 # Add project root to path
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-sys.path.insert(0, project_root)
-os.chdir(project_root)
+import _bootstrap  # noqa: F401
 
 from backend.config import TV_IP
 
-# Try to import upnpclient for DLNA discovery
+# DLNA playback is only needed for the connectivity test
 try:
-    import upnpclient
-    UPNP_AVAILABLE = True
+    from backend.integrations.dlna import play_url_via_dlna
 except ImportError:
-    UPNP_AVAILABLE = False
-    print("⚠️  upnpclient not available - install with: pip install upnpclient")
+    play_url_via_dlna = None
+    print("⚠️  backend.integrations.dlna not available - connectivity test disabled")
+
+# SSDP multicast group and search request
+SSDP_GROUP = ("239.255.255.250", 1900)
+SSDP_MX = 2
+M_SEARCH = (
+    "M-SEARCH * HTTP/1.1\r\n"
+    f"HOST: {SSDP_GROUP[0]}:{SSDP_GROUP[1]}\r\n"
+    'MAN: "ssdp:discover"\r\n'
+    f"MX: {SSDP_MX}\r\n"
+    "ST: ssdp:all\r\n"
+    "\r\n"
+).encode()
+
+SSDP_RCVBUF = 256 * 1024
+
+UPNP_NS = {"d": "urn:schemas-upnp-org:device-1-0"}
+
+# Name fragments that identify Samsung TVs
+SAMSUNG_TAGS = ("samsung", "frame")
+
+# Devices found on earlier runs, keyed by the TV's subnet
+CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "tijdvorm", "dlna_devices.json")
+SUBNET = str(ipaddress.ip_network(f"{TV_IP}/24", strict=False))
+
+def tv_interface_address(tv_ip: str) -> Optional[str]:
+    """Return the local address of the interface that routes to the TV.
+
+    Connecting a UDP socket only performs a route lookup, no packet is sent.
+    """
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect((tv_ip, SSDP_GROUP[1]))
+            return s.getsockname()[0]
+    except OSError:
+        return None
+
+def make_ssdp_socket(tv_ip: str) -> socket.socket:
+    """Create the M-SEARCH socket, pinned to the interface on the TV's subnet."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SSDP_RCVBUF)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+
+    iface_addr = tv_interface_address(tv_ip)
+    if iface_addr:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(iface_addr))
+
+    sock.bind((iface_addr or "0.0.0.0", 0))
+    sock.setblocking(False)
+    return sock
+
+class SSDPProtocol(asyncio.DatagramProtocol):
+    """Collect LOCATION headers from SSDP responses as they arrive."""
+
+    def __init__(self, target_ip: str):
+        self.target_ip = target_ip
+        self.locations: Dict[str, None] = {}  # insertion-ordered set
+        self.target_found = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data, addr):
+        for line in data.decode("utf-8", "ignore").split("\r\n"):
+            key, sep, value = line.partition(":")
+            if not sep or key.strip().lower() != "location":
+                continue
+
+            location = value.strip()
+            if location not in self.locations:
+                self.locations[location] = None
+                if urlparse(location).hostname == self.target_ip and not self.target_found.done():
+                    self.target_found.set_result(location)
+            break
 
 class DLNADiscoveryTester:
-    def __init__(self):
+    def __init__(self, force_rediscover: bool = False):
         self.discovered_devices = []
+        self.force_rediscover = force_rediscover
+        self.cache = self.load_cache()
+        # Devices known to lack AVTransport, shared across subnets by UDN;
+        # --force-rediscover starts from a clean slate
+        self.known_incompatible_udns = (
+            set() if force_rediscover else set(self.cache.get("incompatible_udns", []))
+        )
+        self.known_incompatible_udns.discard("Unknown")
+
+    def load_cache(self) -> Dict[str, Any]:
+        """Load the discovery cache from disk."""
+        try:
+            with open(CACHE_FILE, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def save_cache(self, devices: List[Dict[str, Any]]):
+        """Remember discovered devices for this subnet."""
+        now = time.time()
+        self.cache[SUBNET] = [
+            {"udn": d["udn"], "location": d["location"], "last_seen": now}
+            for d in devices
+        ]
+        self.write_cache()
+
+    def write_cache(self):
+        """Write the discovery cache to disk."""
+        self.cache["incompatible_udns"] = sorted(self.known_incompatible_udns)
+        try:
+            os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+            with open(CACHE_FILE, "w") as f:
+                json.dump(self.cache, f, indent=2)
+        except OSError as e:
+            print(f"⚠️  Could not write discovery cache: {e}")
+
+    async def _try_cached(self) -> Optional[List[Dict[str, Any]]]:
+        """Fetch descriptions of cached devices directly, skipping the SSDP wait.
+
+        Returns None when there is no cache entry or any cached device is gone.
+        """
+        entries = self.cache.get(SUBNET)
+        if not entries:
+            return None
+
+        async with httpx.AsyncClient(timeout=1.0) as client:
+            results = await asyncio.gather(
+                *(self.fetch_description(client, entry["location"]) for entry in entries)
+            )
+
+        if not all(results):
+            return None
+        return results
+
+    async def fetch_description(self, client: httpx.AsyncClient, location: str) -> Optional[Dict[str, Any]]:
+        """Fetch and parse a device description XML."""
+        try:
+            response = await client.get(location)
+            response.raise_for_status()
+            root = ET.fromstring(response.content)
+        except (httpx.HTTPError, ET.ParseError) as e:
+            print(f"   ⚠️  Could not read description at {location}: {e}")
+            return None
+
+        device = root.find("d:device", UPNP_NS)
+        if device is None:
+            return None
+
+        info = {
+            "name": device.findtext("d:friendlyName", default="Unknown", namespaces=UPNP_NS),
+            "location": location,
+            "udn": device.findtext("d:UDN", default="Unknown", namespaces=UPNP_NS),
+            "device_type": device.findtext("d:deviceType", default="Unknown", namespaces=UPNP_NS),
+            "services": []
+        }
+        # Private lowercase copy of the name for filtering, never written to the cache
+        info["_name_lc"] = info["name"].lower()
+
+        # Check for AVTransport service (required for media playback)
+        for service in device.iterfind(".//d:service", UPNP_NS):
+            service_info = {
+                "service_type": service.findtext("d:serviceType", default="Unknown", namespaces=UPNP_NS),
+                "service_id": service.findtext("d:serviceId", default="Unknown", namespaces=UPNP_NS),
+                "control_url": urljoin(location, service.findtext("d:controlURL", default="", namespaces=UPNP_NS))
+            }
+            info["services"].append(service_info)
+
+            # Check if this is an AVTransport service
+            if 'AVTransport' in service_info['service_type']:
+                info["has_avtransport"] = True
+                info["avtransport_control"] = service_info['control_url']
+
+        return info
 
     async def discover_devices(self, timeout: int = 10) -> List[Dict[str, Any]]:
-        """Discover DLNA devices on the network."""
-        if not UPNP_AVAILABLE:
-            print("❌ Cannot perform discovery - upnpclient not installed")
-            return []
+        """Discover DLNA devices on the network.
 
-        print(f"🔍 Discovering DLNA devices (timeout: {timeout}s)...")
+        Sends an SSDP M-SEARCH and collects responses until the target TV
+        answers or the timeout expires, then fetches all device descriptions
+        in parallel.
+        """
         start_time = time.time()
 
+        if not self.force_rediscover:
+            cached = await self._try_cached()
+            if cached:
+                print(f"⚡ Using {len(cached)} cached DLNA device(s) ({time.time() - start_time:.2f}s)")
+                print("   Run with --force-rediscover to search the network again")
+                self.discovered_devices = cached
+                return cached
+
+        print(f"🔍 Discovering DLNA devices (timeout: {timeout}s)...")
+        loop = asyncio.get_running_loop()
+
         try:
-            # Use asyncio to run the blocking discovery
-            devices = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: list(upnpclient.discover(timeout=timeout))
+            transport, protocol = await loop.create_datagram_endpoint(
+                lambda: SSDPProtocol(TV_IP), sock=make_ssdp_socket(TV_IP)
             )
+            try:
+                transport.sendto(M_SEARCH, SSDP_GROUP)
+
+                try:
+                    await asyncio.wait_for(protocol.target_found, timeout)
+                except asyncio.TimeoutError:
+                    pass
+            finally:
+                transport.close()
+
+            async with httpx.AsyncClient(timeout=5) as client:
+                results = await asyncio.gather(
+                    *(self.fetch_description(client, location) for location in protocol.locations)
+                )
+            devices = [info for info in results if info]
 
             discovery_time = time.time() - start_time
 
-            print(".2f"            print(f"Found {len(devices)} DLNA device(s)")
-
-            device_info = []
-            for device in devices:
-                info = {
-                    "name": getattr(device, 'friendly_name', 'Unknown'),
-                    "location": getattr(device, 'location', 'Unknown'),
-                    "udn": getattr(device, 'udn', 'Unknown'),
-                    "device_type": getattr(device, 'device_type', 'Unknown'),
-                    "services": []
-                }
-
-                # Check for AVTransport service (required for media playback)
-                if hasattr(device, 'services'):
-                    for service in device.services:
-                        service_info = {
-                            "service_type": getattr(service, 'service_type', 'Unknown'),
-                            "service_id": getattr(service, 'service_id', 'Unknown'),
-                            "control_url": getattr(service, 'control_url', 'Unknown')
-                        }
-                        info["services"].append(service_info)
-
-                        # Check if this is an AVTransport service
-                        if 'AVTransport' in service_info['service_type']:
-                            info["has_avtransport"] = True
-                            info["avtransport_control"] = service_info['control_url']
-
-                device_info.append(info)
-
-            return device_info
+            print(f"⏱️  Discovery took {discovery_time:.2f}s")
+            print(f"Found {len(devices)} DLNA device(s)")
+
+            self.discovered_devices = devices
+            if devices:
+                self.save_cache(devices)
+            return devices
 
         except Exception as e:
             discovery_time = time.time() - start_time
@@ -91,8 +260,7 @@ class DLNADiscoveryTester:
         other_devices = []
 
         for device in devices:
-            name = device['name']
-            if 'samsung' in name.lower() or 'frame' in name.lower():
+            if any(tag in device['_name_lc'] for tag in SAMSUNG_TAGS):
                 samsung_devices.append(device)
             else:
                 other_devices.append(device)
@@ -111,7 +279,7 @@ class DLNADiscoveryTester:
 
         # Check our target TV specifically
         target_tv_found = any(
-            TV_IP in device.get('location', '') or TV_IP in str(device)
+            urlparse(device.get('location', '')).hostname == TV_IP or TV_IP in device.get('udn', '')
             for device in devices
         )
 
@@ -126,16 +294,38 @@ class DLNADiscoveryTester:
         print(f"\n🔌 Testing Connectivity:")
         print("=" * 30)
 
+        if play_url_via_dlna is None:
+            print("❌ Cannot test connectivity - DLNA playback not available")
+            return
+
         samsung_devices = [
             d for d in devices
-            if 'samsung' in d['name'].lower() or 'frame' in d['name'].lower()
+            if any(tag in d['_name_lc'] for tag in SAMSUNG_TAGS)
         ]
 
         if not samsung_devices:
             print("❌ No Samsung devices found to test")
             return
 
+        incompatible_before = set(self.known_incompatible_udns)
+
         for device in samsung_devices:
+            udn = device['udn']
+            # The freshly parsed description wins: a TV that gained AVTransport
+            # (e.g. DLNA switched on) is no longer incompatible
+            if device.get('has_avtransport'):
+                self.known_incompatible_udns.discard(udn)
+            else:
+                # Without AVTransport playback is guaranteed to fail after a DLNA timeout
+                if udn in self.known_incompatible_udns:
+                    print(f"\n⏭️  {device['name']}: skipping (known to lack AVTransport)")
+                else:
+                    print(f"\n⏭️  {device['name']}: skipping (no AVTransport) — use web interface instead")
+                    # Devices without a UDN all share the "Unknown" placeholder
+                    if udn != "Unknown":
+                        self.known_incompatible_udns.add(udn)
+                continue
+
             print(f"\nTesting {device['name']}...")
             start_time = time.time()
 
@@ -143,37 +333,33 @@ class DLNADiscoveryTester:
             test_url = "https://picsum.photos/800/600.jpg"
 
             try:
-                from backend.integrations.dlna import play_url_via_dlna
+                # Extract IP from device location, e.g. http://192.168.1.100:9197/
+                ip = urlparse(device.get('location', '')).hostname or TV_IP
 
-                # Extract IP from device location
-                location = device.get('location', '')
-                if 'http://' in location:
-                    # Parse IP from URL like http://192.168.1.100:9197/
-                    ip = location.split('http://')[1].split(':')[0].split('/')[0]
-                else:
-                    ip = TV_IP  # Fallback
-
-                result = await asyncio.get_event_loop().run_in_executor(
-                    None, play_url_via_dlna, test_url, ip
-                )
+                result = await asyncio.to_thread(play_url_via_dlna, test_url, ip)
 
                 end_time = time.time()
                 duration = end_time - start_time
 
                 if result:
-                    print(".2f"                else:
-                    print(".2f"
+                    print(f"   ✅ SUCCESS in {duration:.2f}s")
+                else:
+                    print(f"   ❌ FAILED after {duration:.2f}s")
             except Exception as e:
                 end_time = time.time()
                 duration = end_time - start_time
-                print(".2f"                print(f"   Error: {e}")
+                print(f"   ❌ ERROR after {duration:.2f}s")
+                print(f"   Error: {e}")
+
+        if self.known_incompatible_udns != incompatible_before:
+            self.write_cache()
 
 async def main():
     """Main test runner."""
     print("🔍 DLNA Device Discovery & Compatibility Test")
     print("=" * 50)
 
-    tester = DLNADiscoveryTester()
+    tester = DLNADiscoveryTester(force_rediscover="--force-rediscover" in sys.argv[1:])
 
     # Discover devices
     devices = await tester.discover_devices(timeout=15)
@@ -190,7 +376,7 @@ async def main():
         print("   • Samsung TV is turned on")
         print("   • DLNA is enabled in TV settings")
         print("   • TV and computer are on same network")
-        print("   • upnpclient is installed: pip install upnpclient")
+        print("   • UDP multicast (239.255.255.250:1900) is not blocked")
 
 if __name__ == "__main__":
     try:
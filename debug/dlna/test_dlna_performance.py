@@ -5,20 +5,50 @@ Tests speed, reliability, and compatibility of DLNA streaming to Samsung Frame T
 """
 
 import asyncio
+import logging
+import logging.handlers
+import math
 import time
-import statistics
+from collections import deque
 from typing import List, Dict, Any
 import sys
-import os
+
+import httpx
 
 # Add project root to path
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-sys.path.insert(0, project_root)
-os.chdir(project_root)
+import _bootstrap  # noqa: F401
 
 from backend.config import TV_IP
 from backend.integrations.dlna import play_url_via_dlna
 
+class BatchedStreamHandler(logging.handlers.MemoryHandler):
+    """Buffer log records and write each batch to the stream in a single call.
+
+    A plain MemoryHandler forwards records one by one to its target, which
+    still writes and flushes per record.
+    """
+
+    def __init__(self, stream, capacity: int = 50, flushLevel: int = logging.WARNING):
+        super().__init__(capacity, flushLevel=flushLevel)
+        self.stream = stream
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self.buffer:
+                self.stream.write("".join(self.format(record) + "\n" for record in self.buffer))
+                self.stream.flush()
+                self.buffer.clear()
+        finally:
+            self.release()
+
+log_handler = BatchedStreamHandler(sys.stdout)
+log_handler.setFormatter(logging.Formatter("%(message)s"))
+logger = logging.getLogger("dlna_perf")
+logger.setLevel(logging.INFO)
+logger.addHandler(log_handler)
+logger.propagate = False
+
 # Test content URLs (various formats and sizes)
 TEST_CONTENT = {
     "small_jpg": {
@@ -53,27 +83,48 @@ class DLNAPerformanceTester:
         self.results = []
         self.tv_ip = TV_IP
 
+    async def prewarm(self, client: httpx.AsyncClient, url: str) -> bool:
+        """HEAD a URL to warm DNS/TCP and check it is reachable before the TV fetches it."""
+        try:
+            response = await client.head(url, follow_redirects=True)
+            return response.status_code < 400
+        except httpx.HTTPError:
+            return False
+
+    async def prewarm_all(self, contents: Dict[str, Dict[str, Any]]):
+        """Pre-warm all test URLs concurrently."""
+        logger.info("🔥 Pre-warming test URLs...")
+        async with httpx.AsyncClient(timeout=3) as client:
+            results = await asyncio.gather(
+                *(self.prewarm(client, content['url']) for content in contents.values())
+            )
+
+        for name, reachable in zip(contents, results):
+            if not reachable:
+                logger.warning(f"   ⚠️  {name} did not answer a HEAD request")
+
     async def test_single_url(self, name: str, content: Dict[str, Any]) -> Dict[str, Any]:
         """Test streaming a single URL and measure performance."""
-        print(f"\n🎬 Testing {name}: {content['description']}")
-        print(f"   URL: {content['url']}")
-        print(f"   Expected size: {content['expected_size']}")
+        logger.info(f"\n🎬 Testing {name}: {content['description']}")
+        logger.info(f"   URL: {content['url']}")
+        logger.info(f"   Expected size: {content['expected_size']}")
 
         start_time = time.time()
 
         try:
-            result = await asyncio.get_event_loop().run_in_executor(
-                None, play_url_via_dlna, content['url'], self.tv_ip
-            )
+            result = await asyncio.to_thread(play_url_via_dlna, content['url'], self.tv_ip)
 
             end_time = time.time()
             duration = end_time - start_time
 
             if result:
                 status = "✅ SUCCESS"
-                print(".2f"                print("   TV should now be displaying the content"            else:
+                logger.info(f"{status} in {duration:.2f}s")
+                logger.info("   TV should now be displaying the content")
+            else:
                 status = "❌ FAILED"
-                print(".2f"
+                logger.warning(f"{status} after {duration:.2f}s")
+
             return {
                 "name": name,
                 "description": content['description'],
@@ -86,7 +137,7 @@ class DLNAPerformanceTester:
         except Exception as e:
             end_time = time.time()
             duration = end_time - start_time
-            print(f"❌ ERROR after {duration:.2f}s: {e}")
+            logger.warning(f"❌ ERROR after {duration:.2f}s: {e}")
             return {
                 "name": name,
                 "description": content['description'],
@@ -99,118 +150,159 @@ class DLNAPerformanceTester:
 
     async def run_performance_test(self, iterations: int = 5):
         """Run comprehensive performance testing."""
-        print("🚀 DLNA Performance & Reliability Test")
-        print("=" * 50)
-        print(f"TV IP: {self.tv_ip}")
-        print(f"Iterations per content type: {iterations}")
-        print()
+        logger.info("🚀 DLNA Performance & Reliability Test")
+        logger.info("=" * 50)
+        logger.info(f"TV IP: {self.tv_ip}")
+        logger.info(f"Iterations per content type: {iterations}")
+        logger.info("")
+
+        await self.prewarm_all(TEST_CONTENT)
 
         # Test each content type multiple times
         for content_name, content in TEST_CONTENT.items():
-            print(f"\n{'='*40}")
-            print(f"Testing {content_name.upper()}")
-            print(f"{'='*40}")
+            logger.info(f"\n{'='*40}")
+            logger.info(f"Testing {content_name.upper()}")
+            logger.info(f"{'='*40}")
 
             content_results = []
             for i in range(iterations):
-                print(f"\n--- Iteration {i+1}/{iterations} ---")
+                logger.info(f"\n--- Iteration {i+1}/{iterations} ---")
                 result = await self.test_single_url(content_name, content)
                 content_results.append(result)
 
                 # Add delay between tests to avoid overwhelming the TV
                 if i < iterations - 1:
+                    log_handler.flush()
                     await asyncio.sleep(3)
 
             # Analyze results for this content type
             self.analyze_content_results(content_name, content_results)
 
     def analyze_content_results(self, content_name: str, results: List[Dict[str, Any]]):
-        """Analyze results for a specific content type."""
-        successes = [r for r in results if r['success']]
-        failures = [r for r in results if not r['success']]
-
-        success_rate = len(successes) / len(results) * 100
-        success_times = [r['duration'] for r in successes]
-
-        print(f"\n📊 Results for {content_name}:")
-        print(f"   Success Rate: {success_rate:.1f}% ({len(successes)}/{len(results)})")
-
-        if success_times:
-            print(".2f"            print(".2f"            print(".2f"
-        if failures:
-            print(f"   Failures: {len(failures)}")
-            for failure in failures:
-                print(f"      - {failure.get('error', 'Unknown error')}")
+        """Analyze results for a specific content type.
+
+        Timing statistics are accumulated in a single pass; only the last
+        10 error messages are kept for display.
+        """
+        count = 0
+        success_count = 0
+        total = 0.0
+        total_sq = 0.0
+        fastest = math.inf
+        slowest = -math.inf
+        failure_count = 0
+        recent_errors = deque(maxlen=10)
+
+        for r in results:
+            count += 1
+            if r['success']:
+                success_count += 1
+                d = r['duration']
+                total += d
+                total_sq += d * d
+                fastest = min(fastest, d)
+                slowest = max(slowest, d)
+            else:
+                failure_count += 1
+                recent_errors.append(r.get('error', 'Unknown error'))
+
+        if not count:
+            return
+
+        success_rate = success_count / count * 100
+
+        logger.info(f"\n📊 Results for {content_name}:")
+        logger.info(f"   Success Rate: {success_rate:.1f}% ({success_count}/{count})")
+
+        if success_count:
+            mean = total / success_count
+            logger.info(f"   Average Time: {mean:.2f}s")
+            logger.info(f"   Fastest: {fastest:.2f}s")
+            logger.info(f"   Slowest: {slowest:.2f}s")
+            if success_count > 1:
+                # Sample standard deviation, matching statistics.stdev
+                variance = (total_sq - success_count * mean * mean) / (success_count - 1)
+                logger.info(f"   Std Dev: {math.sqrt(max(0.0, variance)):.2f}s")
+
+        if failure_count:
+            logger.info(f"   Failures: {failure_count}")
+            for error in recent_errors:
+                logger.info(f"      - {error}")
 
     async def run_reliability_test(self, duration_minutes: int = 10):
         """Run long-term reliability test."""
-        print(f"\n🔄 DLNA Long-term Reliability Test ({duration_minutes} minutes)")
-        print("=" * 60)
-
-        end_time = time.time() + (duration_minutes * 60)
+        logger.info(f"\n🔄 DLNA Long-term Reliability Test ({duration_minutes} minutes)")
+        logger.info("=" * 60)
+
+        # Schedule tests on a fixed monotonic grid so test duration doesn't cause drift
+        loop = asyncio.get_running_loop()
+        interval = 10.0
+        start = loop.time()
+        end_time = start + duration_minutes * 60
         test_count = 0
         successes = 0
 
         # Use a reliable test image
         test_content = TEST_CONTENT["medium_jpg"]
 
-        while time.time() < end_time:
+        while loop.time() < end_time:
             test_count += 1
-            print(f"\n--- Test {test_count} ---")
+            logger.info(f"\n--- Test {test_count} ---")
 
             result = await self.test_single_url("reliability_test", test_content)
             if result['success']:
                 successes += 1
 
-            # Wait before next test
-            remaining_time = end_time - time.time()
-            if remaining_time > 10:
-                print(f"⏱️  Waiting 10 seconds before next test...")
-                await asyncio.sleep(10)
-            elif remaining_time > 0:
-                print(f"⏱️  Waiting {remaining_time:.1f} seconds before finishing...")
-                await asyncio.sleep(remaining_time)
+            # Wait until the next slot (or the end of the test)
+            deadline = min(start + test_count * interval, end_time)
+            sleep_for = deadline - loop.time()
+            if sleep_for > 0:
+                logger.info(f"⏱️  Waiting {sleep_for:.1f} seconds before next test...")
+                log_handler.flush()
+                await asyncio.sleep(sleep_for)
 
         # Final results
         reliability_rate = successes / test_count * 100
-        print(f"\n🏁 Reliability Test Complete:")
-        print(f"   Total Tests: {test_count}")
-        print(f"   Success Rate: {reliability_rate:.1f}%")
-        print(f"   Duration: {duration_minutes} minutes")
+        logger.info(f"\n🏁 Reliability Test Complete:")
+        logger.info(f"   Total Tests: {test_count}")
+        logger.info(f"   Success Rate: {reliability_rate:.1f}%")
+        logger.info(f"   Duration: {duration_minutes} minutes")
 
         if reliability_rate >= 95:
-            print("   ✅ EXCELLENT reliability!")
+            logger.info("   ✅ EXCELLENT reliability!")
         elif reliability_rate >= 85:
-            print("   ⚠️  GOOD reliability")
+            logger.info("   ⚠️  GOOD reliability")
         else:
-            print("   ❌ POOR reliability - investigate issues")
+            logger.info("   ❌ POOR reliability - investigate issues")
 
     async def run_speed_comparison(self):
         """Compare loading speeds of different content types."""
-        print(f"\n⚡ DLNA Speed Comparison Test")
-        print("=" * 40)
+        logger.info(f"\n⚡ DLNA Speed Comparison Test")
+        logger.info("=" * 40)
 
         results = []
 
-        # Test each content type once
-        for content_name, content in TEST_CONTENT.items():
-            if content_name == "local_image":
-                continue  # Skip local image for speed comparison
+        # Skip local image for speed comparison
+        contents = {name: content for name, content in TEST_CONTENT.items() if name != "local_image"}
+        await self.prewarm_all(contents)
 
-            print(f"\nTesting {content_name}...")
+        # Test each content type once
+        for content_name, content in contents.items():
+            logger.info(f"\nTesting {content_name}...")
             result = await self.test_single_url(content_name, content)
             results.append(result)
 
             # Wait between tests
+            log_handler.flush()
             await asyncio.sleep(2)
 
         # Sort by speed
         successful_results = [r for r in results if r['success']]
         successful_results.sort(key=lambda x: x['duration'])
 
-        print(f"\n🏆 Speed Rankings (fastest to slowest):")
+        logger.info(f"\n🏆 Speed Rankings (fastest to slowest):")
         for i, result in enumerate(successful_results, 1):
-            print("2d")
+            logger.info(f"   {i:2d}. {result['name']}: {result['duration']:.2f}s")
 
 async def main():
     """Main test runner."""
@@ -229,17 +321,15 @@ async def main():
     elif test_type == "speed":
         await tester.run_speed_comparison()
     else:
-        print("Usage: python test_dlna_performance.py [performance|reliability|speed]")
-        print("  performance: Test each content type multiple times")
-        print("  reliability: Long-term reliability test (default 5 minutes)")
-        print("  speed: Compare loading speeds of different content")
+        logger.info("Usage: python test_dlna_performance.py [performance|reliability|speed]")
+        logger.info("  performance: Test each content type multiple times")
+        logger.info("  reliability: Long-term reliability test (default 5 minutes)")
+        logger.info("  speed: Compare loading speeds of different content")
 
 if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("\n🛑 Test interrupted by user")
+        logger.info("\n🛑 Test interrupted by user")
     except Exception as e:
-        print(f"\n❌ Fatal error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"\n❌ Fatal error: {e}")
@@ -4,114 +4,223 @@ Samsung TV Web Interface Testing
 Test direct HTTP uploads to Samsung Frame TV web interface
 """
 
-import requests
+import asyncio
+import json
+import httpx
 import time
-import sys
 import os
 
-# Add project root to path and change working directory
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-sys.path.insert(0, project_root)
-os.chdir(project_root)
-
 # Import TV_IP directly
 TV_IP = "10.0.1.111"  # Hardcoded for testing
 
-def test_web_interface_access():
-    """Test if we can access the TV's web interface."""
-    print("🌐 Testing Samsung TV Web Interface Access")
-    print("=" * 50)
+# Common Samsung TV upload endpoints, most likely first
+UPLOAD_ENDPOINTS = (
+    "/ws/app/PictureShare",
+    "/ws/app/ImageShow",
+    "/ws/app/MediaRenderer",
+    "/api/v1/media",
+    "/upload",
+    "/image",
+)
+
+# Open ports and working endpoints found on earlier runs, keyed by TV IP
+PORT_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "tijdvorm", "tv_ports.json")
+
+def load_port_cache():
+    """Load cached probe results from disk."""
+    try:
+        with open(PORT_CACHE_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def update_port_cache(**fields):
+    """Merge probe results for this TV into the cache."""
+    cache = load_port_cache()
+    entry = cache.setdefault(TV_IP, {})
+    entry.update(fields, last_seen=time.time())
+    try:
+        os.makedirs(os.path.dirname(PORT_CACHE_FILE), exist_ok=True)
+        with open(PORT_CACHE_FILE, "w") as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        print(f"⚠️  Could not write port cache: {e}")
+
+def save_open_port(port):
+    """Remember an open port so the next run probes it first."""
+    update_port_cache(open_port=port)
 
-    # Common Samsung TV web interface URLs
-    test_urls = [
+def save_endpoint_success(endpoint, successes):
+    """Count a working upload endpoint so later runs try it first."""
+    successes[endpoint] = successes.get(endpoint, 0) + 1
+    update_port_cache(endpoint_successes=successes)
+
+async def fetch_url(client, url, preview_bytes=200):
+    """Probe a URL with HEAD, fetching at most preview_bytes of the body on 200.
+
+    Falls back to a streamed GET when the TV does not implement HEAD.
+    Returns (status_code, preview) or (exception, None).
+    """
+    try:
+        head = await client.head(url)
+        if head.status_code not in (200, 405):
+            return head.status_code, None
+
+        if head.status_code == 200:
+            status, headers = 200, {"Range": f"bytes=0-{preview_bytes - 1}"}
+        else:
+            status, headers = None, None
+
+        async with client.stream("GET", url, headers=headers) as response:
+            preview = b""
+            async for chunk in response.aiter_bytes(preview_bytes):
+                preview = chunk[:preview_bytes]
+                break
+            return status or response.status_code, preview.decode("utf-8", "ignore")
+    except httpx.HTTPError as e:
+        return e, None
+
+def web_interface_urls():
+    """Common Samsung TV web interface URLs, in priority order."""
+    return [
         f"http://{TV_IP}:8001",  # Samsung Smart TV web interface
         f"http://{TV_IP}:8080",  # Alternative port
         f"http://{TV_IP}",       # Default HTTP port
     ]
 
-    for url in test_urls:
-        try:
-            print(f"\n🔍 Testing {url}...")
-            response = requests.get(url, timeout=5)
-            print(f"   Status: {response.status_code}")
-
-            if response.status_code == 200:
-                print(f"   ✅ Web interface accessible at {url}")
-                print(f"   Content preview: {response.text[:200]}...")
-                return url
-            elif response.status_code == 401:
-                print(f"   ⚠️  Web interface exists but requires authentication at {url}")
-                print("   This is GOOD news - the web server is running!")
-                return url
-            elif response.status_code == 403:
-                print(f"   ⚠️  Web interface exists but access forbidden at {url}")
-                return url
-
-        except requests.exceptions.RequestException as e:
-            print(f"   ❌ Connection failed: {e}")
+async def probe_web_interfaces(client):
+    """Probe all web interface URLs at once without printing anything."""
+    return await asyncio.gather(*(fetch_url(client, url) for url in web_interface_urls()))
+
+def report_web_interface(responses):
+    """Report web interface probe results in priority order; return the first usable URL."""
+    print("🌐 Testing Samsung TV Web Interface Access")
+    print("=" * 50)
+
+    test_urls = web_interface_urls()
+    for url, (status, preview) in zip(test_urls, responses):
+        print(f"\n🔍 Testing {url}...")
+        if isinstance(status, Exception):
+            print(f"   ❌ Connection failed: {status}")
+            continue
+
+        print(f"   Status: {status}")
+
+        if status == 200:
+            print(f"   ✅ Web interface accessible at {url}")
+            print(f"   Content preview: {preview}...")
+            return url
+        elif status == 401:
+            print(f"   ⚠️  Web interface exists but requires authentication at {url}")
+            print("   This is GOOD news - the web server is running!")
+            return url
+        elif status == 403:
+            print(f"   ⚠️  Web interface exists but access forbidden at {url}")
+            return url
 
     print("\n❌ No web interface found on common ports")
     print("💡 Samsung TVs typically use port 8001 for web interface")
     return None
 
-def test_media_upload_endpoint(base_url):
+async def probe_endpoint(client, url):
+    """HEAD an endpoint, falling back to a 1-byte GET when HEAD is not allowed."""
+    try:
+        response = await client.head(url, timeout=2)
+        if response.status_code == 405:
+            response = await client.get(url, headers={"Range": "bytes=0-0"}, timeout=2)
+        return response
+    except httpx.HTTPError as e:
+        return e
+
+def report_endpoint(endpoint, response):
+    """Print a probe result and return whether the endpoint exists."""
+    print(f"\n🔍 Testing {endpoint}...")
+    if isinstance(response, Exception):
+        print(f"   ❌ Failed: {response}")
+        return False
+
+    print(f"   Status: {response.status_code}")
+    if response.status_code in [200, 401, 403]:
+        print(f"   ✅ Endpoint exists: {endpoint}")
+        return True
+    return False
+
+async def test_media_upload_endpoint(client, base_url):
     """Test potential media upload endpoints."""
     print(f"\n📤 Testing Media Upload Endpoints")
     print("=" * 40)
 
-    # Common Samsung TV upload endpoints
-    endpoints = [
-        "/ws/app/PictureShare",
-        "/ws/app/ImageShow",
-        "/ws/app/MediaRenderer",
-        "/api/v1/media",
-        "/upload",
-        "/image",
-    ]
+    # Try endpoints that worked before first
+    successes = load_port_cache().get(TV_IP, {}).get("endpoint_successes", {})
+    endpoints = sorted(UPLOAD_ENDPOINTS, key=lambda e: -successes.get(e, 0))
 
-    for endpoint in endpoints:
-        url = f"{base_url}{endpoint}"
-        try:
-            print(f"\n🔍 Testing {endpoint}...")
-            response = requests.get(url, timeout=5)
-            print(f"   Status: {response.status_code}")
+    # A previously working endpoint is probed on its own, skipping the rest if it still works
+    if successes.get(endpoints[0]):
+        first, endpoints = endpoints[0], endpoints[1:]
+        response = await probe_endpoint(client, f"{base_url}{first}")
+        if report_endpoint(first, response):
+            save_endpoint_success(first, successes)
+            return f"{base_url}{first}"
 
-            if response.status_code in [200, 401, 403]:
-                print(f"   ✅ Endpoint exists: {endpoint}")
-                return url
+    # Probe the remaining endpoints concurrently over the shared keep-alive client
+    responses = await asyncio.gather(
+        *(probe_endpoint(client, f"{base_url}{endpoint}") for endpoint in endpoints)
+    )
 
-        except requests.exceptions.RequestException as e:
-            print(f"   ❌ Failed: {e}")
+    for endpoint, response in zip(endpoints, responses):
+        if report_endpoint(endpoint, response):
+            save_endpoint_success(endpoint, successes)
+            return f"{base_url}{endpoint}"
 
     print("\n❌ No upload endpoints found")
     return None
 
-def test_basic_connectivity():
+async def probe_port(port, timeout=2.0):
+    """Return whether a TCP connection to the TV port succeeds."""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(TV_IP, port), timeout=timeout)
+    except (asyncio.TimeoutError, OSError):
+        return False
+
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+async def test_basic_connectivity():
     """Test basic network connectivity to TV."""
     print(f"\n🔌 Testing Basic Network Connectivity")
     print("=" * 40)
 
-    import socket
-
     try:
         # Test basic TCP connectivity to common ports
         ports_to_test = [80, 443, 8001, 8080, 9197]
 
-        for port in ports_to_test:
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(2)
-                result = sock.connect_ex((TV_IP, port))
-                sock.close()
+        # Try the port that was open last time on its own first
+        cached_port = load_port_cache().get(TV_IP, {}).get("open_port")
+        if cached_port in ports_to_test:
+            if await probe_port(cached_port):
+                print(f"   ✅ Port {cached_port}: OPEN (cached)")
+                return cached_port
+            ports_to_test.remove(cached_port)
 
-                if result == 0:
-                    print(f"   ✅ Port {port}: OPEN")
-                    return port
-                else:
-                    print(f"   ❌ Port {port}: CLOSED")
+        # Probe the remaining ports in parallel
+        results = await asyncio.gather(*(probe_port(port) for port in ports_to_test))
 
-            except Exception as e:
-                print(f"   ❌ Port {port}: ERROR - {e}")
+        open_port = None
+        for port, is_open in zip(ports_to_test, results):
+            if is_open:
+                print(f"   ✅ Port {port}: OPEN")
+                if open_port is None:
+                    open_port = port
+            else:
+                print(f"   ❌ Port {port}: CLOSED")
+
+        if open_port is not None:
+            save_open_port(open_port)
+            return open_port
 
     except Exception as e:
         print(f"❌ Network test failed: {e}")
@@ -120,21 +229,32 @@ def test_basic_connectivity():
     print("💡 Check if TV is powered on and on the same network")
     return None
 
-def main():
+async def main():
     """Main test function."""
     print("📺 Samsung Frame TV Web Interface Investigation")
     print("=" * 55)
     print(f"Target TV IP: {TV_IP}")
     print()
 
-    # Test 1: Basic connectivity
-    open_port = test_basic_connectivity()
+    async with httpx.AsyncClient(timeout=5) as client:
+        await run_tests(client)
+
+async def run_tests(client):
+    """Run the connectivity, web interface and upload tests with a shared HTTP client."""
+    # Test 1 + 2: Basic connectivity and the web interface probes overlap on
+    # the network, but only the connectivity test prints while they run; the
+    # web results are reported afterwards, and only if the TV is reachable
+    open_port, web_responses = await asyncio.gather(
+        test_basic_connectivity(),
+        probe_web_interfaces(client),
+    )
     if not open_port:
         print("\n❌ Cannot connect to TV - check network and power")
         return
 
-    # Test 2: Web interface access
-    web_url = test_web_interface_access()
+    print()
+    web_url = report_web_interface(web_responses)
+
     if web_url:
         print(f"\n🎉 SUCCESS! Samsung TV web interface found at: {web_url}")
         print("   Status: Web server is running and responding")
@@ -147,7 +267,7 @@ def main():
         return
 
     # Test 3: Upload endpoints
-    upload_url = test_media_upload_endpoint(web_url)
+    upload_url = await test_media_upload_endpoint(client, web_url)
     if upload_url:
         print("\n🎉 SUCCESS! Found upload endpoint:")
         print(f"   {upload_url}")
@@ -158,7 +278,7 @@ def main():
 
 if __name__ == "__main__":
     try:
-        main()
+        asyncio.run(main())
     except KeyboardInterrupt:
         print("\n🛑 Test cancelled")
     except Exception as e:
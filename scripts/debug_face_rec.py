@@ -1,8 +1,9 @@
+import math
 import os
 import face_recognition
 import numpy as np
 import pickle
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageOps
 import sys
 
 # Hack: Append project root to sys.path if running as script
@@ -48,19 +49,37 @@ def process_image():
     try:
         img = Image.open(INPUT_FILE)
         
-        # 1. Resize to fill height
+        # 0. Let libjpeg decode at 1/2, 1/4 or 1/8 scale while keeping at
+        # least 2x the target height, then apply the EXIF rotation
+        displayed_height = img.height
+        if img.getexif().get(0x0112, 1) in (5, 6, 7, 8):  # rotated 90/270
+            displayed_height = img.width
+        scale = min(1.0, 2 * TARGET_HEIGHT / displayed_height)
+        img.draft("RGB", (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+        img = ImageOps.exif_transpose(img)
+        print(f"[Debug] Decoded at {img.width}x{img.height}")
+        
+        # 1+2. Resize to fill height and crop to 1080 width, aligned center
         original_width, original_height = img.size
         ratio = TARGET_HEIGHT / original_height
         new_width = int(original_width * ratio)
         new_height = TARGET_HEIGHT
         
         print(f"[Debug] Resizing from {original_width}x{original_height} to {new_width}x{new_height}")
-        img_resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
-        # 2. Crop to 1080 width, aligned center
         print(f"[Debug] Cropping to {TARGET_WIDTH}x{TARGET_HEIGHT} (Center)")
-        left_offset = (new_width - TARGET_WIDTH) // 2
-        img_cropped = img_resized.crop((left_offset, 0, left_offset + TARGET_WIDTH, TARGET_HEIGHT))
+        if new_width >= TARGET_WIDTH:
+            # Resample only the source region that survives the crop
+            box_width = TARGET_WIDTH / ratio
+            box_left = (original_width - box_width) / 2
+            img_cropped = img.resize(
+                (TARGET_WIDTH, TARGET_HEIGHT), Image.Resampling.LANCZOS,
+                box=(box_left, 0, box_left + box_width, original_height),
+            )
+        else:
+            # Narrower than the target: resize, then pad via crop
+            img_resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            left_offset = (new_width - TARGET_WIDTH) // 2
+            img_cropped = img_resized.crop((left_offset, 0, left_offset + TARGET_WIDTH, TARGET_HEIGHT))
         
         # 3. Detect Faces
         print("[Debug] Detecting faces...")